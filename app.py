@@ -21,8 +21,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for better styling
-st.markdown("""
+# Custom CSS for better styling, built once at import so reruns only pay
+# the single markdown call (the style element must be re-emitted per run
+# or Streamlit drops it from the page)
+_APP_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -63,10 +65,13 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
+st.markdown(_APP_CSS, unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
 def initialize_system():
-    """Initialize the data retrieval system"""
+    """Initialize the data retrieval system (runs once per process)"""
     try:
         # Create database tables
         db_manager.create_tables()
@@ -101,6 +106,22 @@ def initialize_system():
         os.makedirs(Config.EXPORTS_DIR, exist_ok=True)
         os.makedirs(Config.SCHEMAS_DIR, exist_ok=True)
         
+        # Route module-logger diagnostics to a rotating file instead of
+        # stdout (runs once per process alongside the rest of the init)
+        import logging
+        from logging.handlers import RotatingFileHandler
+        root = logging.getLogger()
+        if not root.handlers:
+            handler = RotatingFileHandler(
+                os.path.join(Config.LOGS_DIR, 'app.log'),
+                maxBytes=5 * 1024 * 1024, backupCount=3, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter(
+                '%(asctime)s %(levelname)s %(name)s: %(message)s'
+            ))
+            root.addHandler(handler)
+            root.setLevel(logging.WARNING)
+        
         return True
         
     except Exception as e:
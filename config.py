@@ -43,6 +43,19 @@ class Config:
         'user': 'User'
     }
     
+    # Secret for signing the session-restore cookie; unset disables
+    # cookie-based login restore
+    COOKIE_SECRET = os.getenv('DATADOCK_COOKIE_SECRET', '')
+    
+    # Cap on rows fetched per table during person searches; bounds the
+    # memory one global search can hold across many sources
+    SEARCH_ROW_LIMIT = int(os.getenv('DATADOCK_SEARCH_ROW_LIMIT', '5000'))
+    
+    # Password hashing: bcrypt cost factor (each step doubles the work)
+    # and optional 'argon2' algorithm when argon2-cffi is installed
+    BCRYPT_ROUNDS = int(os.getenv('DATADOCK_BCRYPT_ROUNDS', '12'))
+    PASSWORD_ALGO = os.getenv('DATADOCK_PASSWORD_ALGO', 'bcrypt')
+    
     # Audit log settings
     AUDIT_LOG_FILE = os.path.join(LOGS_DIR, 'audit.log')
     
@@ -0,0 +1,59 @@
+import re
+from config import Config
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Precompiled keyword matchers shared by the connectors. Column names are
+# checked on every query result, so one C-level regex scan per column beats
+# the nested any(keyword in col) Python loops these replaced.
+
+SENSITIVE_RE = re.compile("|".join(map(re.escape, Config.SENSITIVE_FIELDS)), re.I)
+
+# Columns worth searching when looking up a person (search predicates)
+PERSON_SEARCH_RE = re.compile(
+    "|".join(['name', 'first', 'last', 'full', 'person', 'user', 'customer', 'client']),
+    re.I
+)
+
+_PERSON_IDENTIFIER_KEYWORDS = [
+    'name', 'first', 'last', 'full', 'person', 'user', 'customer', 'client', 'id'
+]
+
+# Columns that identify a person in schema metadata (includes id-style columns)
+PERSON_IDENTIFIER_RE = re.compile("|".join(_PERSON_IDENTIFIER_KEYWORDS), re.I)
+
+def _build_automaton(keywords):
+    """Build an Aho-Corasick automaton: O(len) matching regardless of keyword count"""
+    automaton = ahocorasick.Automaton()
+    for word in keywords:
+        automaton.add_word(word.lower(), word)
+    automaton.make_automaton()
+    return automaton
+
+if ahocorasick is not None:
+    _SENSITIVE_AC = _build_automaton(Config.SENSITIVE_FIELDS)
+    _PERSON_AC = _build_automaton(_PERSON_IDENTIFIER_KEYWORDS)
+else:
+    _SENSITIVE_AC = None
+    _PERSON_AC = None
+
+def _ac_matches(automaton, text: str) -> bool:
+    """Short-circuit on the first automaton hit"""
+    for _ in automaton.iter(text):
+        return True
+    return False
+
+def is_sensitive_column(column_name: str) -> bool:
+    """Check if a column name looks like it holds sensitive data"""
+    if _SENSITIVE_AC is not None:
+        return _ac_matches(_SENSITIVE_AC, column_name.lower())
+    return SENSITIVE_RE.search(column_name) is not None
+
+def is_person_identifier_column(column_name: str) -> bool:
+    """Check if a column name looks like a person identifier"""
+    if _PERSON_AC is not None:
+        return _ac_matches(_PERSON_AC, column_name.lower())
+    return PERSON_IDENTIFIER_RE.search(column_name) is not None
@@ -1,7 +1,95 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+import logging
+import threading
+import time
 import pandas as pd
 from typing import Dict, List, Any, Optional
 from config import Config
+from ._matchers import SENSITIVE_RE, PERSON_SEARCH_RE
+
+logger = logging.getLogger(__name__)
+
+class _QueryCache:
+    """Small TTL'd LRU cache for query results
+
+    Streamlit reruns reissue identical queries on every widget
+    interaction; keeping the last few results amortizes those repeats to
+    a dict lookup. Lock-guarded because engines (and thus connectors)
+    are shared across sessions.
+    """
+
+    def __init__(self, maxsize: int = 64, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            ts, value = entry
+            if time.monotonic() - ts > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: tuple, value: pd.DataFrame):
+        with self._lock:
+            now = time.monotonic()
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Shared across all connectors in the process
+query_result_cache = _QueryCache()
+
+def _freeze_param(value):
+    """Make a parameter value hashable for cache keys
+
+    Lists (e.g. the table-name list bound into the pg_class row-count
+    query) become tuples; anything still unhashable falls back to its
+    repr so key building never raises.
+    """
+    if isinstance(value, list):
+        value = tuple(value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+def make_query_cache_key(name: str, query: str, params: Optional[Dict[str, Any]]) -> tuple:
+    """Build a stable cache key for a connector query"""
+    if not params:
+        return (name, query, None)
+    return (name, query, tuple(sorted((k, _freeze_param(v)) for k, v in params.items())))
+
+@lru_cache(maxsize=256)
+def _build_person_search_query(table: str, columns: tuple, use_ilike: bool = False,
+                               limit: Optional[int] = None) -> str:
+    """Build (and cache) the person-search SQL for a table/column set
+
+    ILIKE (Postgres) can use pg_trgm GIN indexes, while the wrapped
+    LOWER(col) LIKE form always forces a sequential scan.
+    """
+    if use_ilike:
+        where_clause = " OR ".join(f"{col} ILIKE :ident" for col in columns)
+    else:
+        where_clause = " OR ".join(f"LOWER({col}) LIKE :ident" for col in columns)
+    query = f"SELECT * FROM {table} WHERE {where_clause}"
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+    return query
 
 class BaseConnector(ABC):
     """Base class for all data connectors"""
@@ -22,13 +110,13 @@ class BaseConnector(ABC):
         pass
     
     @abstractmethod
-    def get_schema(self) -> Dict[str, Any]:
-        """Get schema information"""
+    def get_schema(self, refresh: bool = False) -> Dict[str, Any]:
+        """Get schema information, optionally bypassing any cached copy"""
         pass
     
     @abstractmethod
-    def execute_query(self, query: str) -> pd.DataFrame:
-        """Execute query and return results as DataFrame"""
+    def execute_query(self, query: str, params: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Execute query with optional bound parameters and return results as DataFrame"""
         pass
     
     @abstractmethod
@@ -43,19 +131,21 @@ class BaseConnector(ABC):
         
         # Get sensitive fields for this table
         sensitive_fields = self._get_sensitive_fields(table_name)
-        
-        # Remove sensitive columns
-        columns_to_remove = []
+
+        # Keep non-sensitive columns (one compiled-regex scan per column);
+        # selecting keepers avoids the full BlockManager copy df.drop makes
+        keep = []
         for col in df.columns:
             col_lower = col.lower()
-            if any(sensitive in col_lower for sensitive in Config.SENSITIVE_FIELDS):
-                columns_to_remove.append(col)
-            elif any(sensitive in col_lower for sensitive in sensitive_fields):
-                columns_to_remove.append(col)
-        
-        if columns_to_remove:
-            df = df.drop(columns=columns_to_remove)
-        
+            if SENSITIVE_RE.search(col_lower):
+                continue
+            if any(sensitive in col_lower for sensitive in sensitive_fields):
+                continue
+            keep.append(col)
+
+        if len(keep) != len(df.columns):
+            return df.loc[:, keep]
+
         return df
     
     def _get_sensitive_fields(self, table_name: str) -> List[str]:
@@ -63,53 +153,63 @@ class BaseConnector(ABC):
         # This can be overridden by subclasses to provide table-specific sensitive fields
         return []
     
-    def search_person_records(self, identifier: str, tables: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
-        """Search for person-related records across tables"""
+    def search_person_records(self, identifier: str, tables: Optional[List[str]] = None,
+                              limit: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """Search for person-related records across tables
+
+        limit caps the rows fetched per table at the server, bounding
+        the memory a single wide match can pin during a global search.
+        """
         results = {}
         
         if tables is None:
             tables = self.list_tables()
         
+        # Bind the identifier once so the server can reuse its prepared
+        # statement plan across searches (and to rule out SQL injection)
+        params = {"ident": f"%{identifier.lower()}%"}
+
+        # Introspect once for the whole search rather than per table
+        schema = self.get_schema()
+
         for table in tables:
             try:
                 # Search in person identifier columns
-                person_columns = self._get_person_identifier_columns(table)
-                
+                person_columns = self._person_identifier_columns_from_schema(schema, table)
+
                 if person_columns:
-                    query_parts = []
-                    for col in person_columns:
-                        query_parts.append(f"LOWER({col}) LIKE LOWER('%{identifier}%')")
-                    
-                    where_clause = " OR ".join(query_parts)
-                    query = f"SELECT * FROM {table} WHERE {where_clause}"
-                    
-                    df = self.execute_query(query)
+                    query = _build_person_search_query(
+                        table, tuple(person_columns), self._search_uses_ilike(), limit
+                    )
+
+                    df = self.execute_query(query, params)
                     if not df.empty:
                         # Filter sensitive fields
                         df = self.filter_sensitive_fields(df, table)
                         results[table] = df
                         
             except Exception as e:
-                print(f"Error searching table {table}: {e}")
+                logger.error("Error searching table %s: %s", table, e)
                 continue
         
         return results
     
+    def _search_uses_ilike(self) -> bool:
+        """Whether person searches should use ILIKE (index-friendly on Postgres)"""
+        return False
+
     def _get_person_identifier_columns(self, table_name: str) -> List[str]:
         """Get columns that can be used to identify persons"""
         # This can be overridden by subclasses to provide table-specific person identifiers
-        schema = self.get_schema()
+        return self._person_identifier_columns_from_schema(self.get_schema(), table_name)
+
+    @staticmethod
+    def _person_identifier_columns_from_schema(schema: Dict[str, Any], table_name: str) -> List[str]:
+        """Pick person identifier columns for a table from an already-fetched schema"""
         if table_name in schema:
             columns = schema[table_name].get('columns', [])
-            person_columns = []
-            
-            for col in columns:
-                col_lower = col['name'].lower()
-                if any(identifier in col_lower for identifier in ['name', 'first', 'last', 'full', 'person', 'user', 'customer', 'client']):
-                    person_columns.append(col['name'])
-            
-            return person_columns
-        
+            return [col['name'] for col in columns if PERSON_SEARCH_RE.search(col['name'])]
+
         return []
     
     def __enter__(self):
@@ -1,5 +1,6 @@
 from typing import Dict, Any
-from .sql_connector import SQLConnector
+from sqlalchemy import text
+from .sql_connector import SQLConnector, get_engine
 from .file_connector import FileConnector
 from config import Config
 
@@ -43,14 +44,23 @@ class ConnectorFactory:
         """Test connection to data source"""
         try:
             connector = ConnectorFactory.create_connector(data_source_config)
+
+            if isinstance(connector, SQLConnector):
+                # Ping through the pooled engine instead of building and
+                # disposing a throwaway engine
+                engine = get_engine(connector.connection_string)
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                return True, "Connection successful"
+
             success = connector.connect()
             connector.disconnect()
-            
+
             if success:
                 return True, "Connection successful"
             else:
                 return False, "Failed to connect"
-                
+
         except Exception as e:
             return False, f"Connection error: {str(e)}"
     
@@ -1,9 +1,24 @@
+import logging
 import pandas as pd
+import numpy as np
 import json
 import xml.etree.ElementTree as ET
 import os
 from typing import Dict, List, Any, Optional
 from .base import BaseConnector
+from ._matchers import is_sensitive_column, is_person_identifier_column
+
+logger = logging.getLogger(__name__)
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+try:
+    import pyarrow.csv as pacsv
+except ImportError:
+    pacsv = None
 
 class FileConnector(BaseConnector):
     """File connector for CSV, JSON, and XML files"""
@@ -12,66 +27,185 @@ class FileConnector(BaseConnector):
         super().__init__(file_path, name)
         self.file_path = file_path
         self.file_type = file_type
-        self.data = None
-    
+        self._data = None
+        self._sample = None
+        self._person_col_str = None
+        self._duck = None
+
+    @property
+    def data(self) -> Optional[pd.DataFrame]:
+        """Full file contents, loaded lazily on first access"""
+        if self._data is None and self.is_connected:
+            self._data = self._load_full()
+        return self._data
+
     def connect(self) -> bool:
-        """Load file data"""
+        """Open the file source (full data is loaded lazily on first use)"""
         try:
-            if self.file_type == 'csv':
-                self.data = pd.read_csv(self.file_path)
-            elif self.file_type == 'json':
-                with open(self.file_path, 'r', encoding='utf-8') as f:
-                    json_data = json.load(f)
-                    if isinstance(json_data, list):
-                        self.data = pd.DataFrame(json_data)
-                    else:
-                        # Flatten nested JSON
-                        self.data = pd.json_normalize(json_data)
-            elif self.file_type == 'xml':
-                self.data = self._parse_xml()
-            else:
+            if self.file_type not in ('csv', 'json', 'xml'):
                 raise ValueError(f"Unsupported file type: {self.file_type}")
-            
+
+            if not os.path.isfile(self.file_path):
+                raise FileNotFoundError(self.file_path)
+
+            if self.file_type == 'csv':
+                # Cheap sample for schema/preview paths; validates the parse
+                # without reading a potentially huge file into memory
+                self._sample = pd.read_csv(self.file_path, nrows=1024)
+
             self.is_connected = True
             return True
         except Exception as e:
-            print(f"Error loading file {self.file_path}: {e}")
+            logger.error("Error loading file %s: %s", self.file_path, e)
             self.is_connected = False
             return False
-    
+
+    def _load_full(self) -> Optional[pd.DataFrame]:
+        """Load the complete file into a DataFrame"""
+        try:
+            if self.file_type == 'csv':
+                return self._read_csv_full()
+            elif self.file_type == 'json':
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    json_data = json.load(f)
+                if isinstance(json_data, list):
+                    return pd.DataFrame(json_data)
+                # Flatten nested JSON
+                return pd.json_normalize(json_data)
+            elif self.file_type == 'xml':
+                return self._parse_xml()
+        except Exception as e:
+            logger.error("Error loading file %s: %s", self.file_path, e)
+        return None
+
+    def _read_csv_full(self) -> pd.DataFrame:
+        """Read the full CSV, using PyArrow's multi-threaded parser when available"""
+        if pacsv is not None:
+            try:
+                tbl = pacsv.read_csv(
+                    self.file_path,
+                    read_options=pacsv.ReadOptions(use_threads=True)
+                )
+                return tbl.to_pandas(self_destruct=True)
+            except Exception as e:
+                logger.warning("PyArrow CSV parse failed, falling back to pandas: %s", e)
+        return pd.read_csv(self.file_path)
+
     def disconnect(self):
         """Clear loaded data"""
-        self.data = None
+        self._data = None
+        self._sample = None
+        self._person_col_str = None
+        if self._duck is not None:
+            self._duck.close()
+            self._duck = None
         self.is_connected = False
+
+    def _get_duckdb(self):
+        """Get (and cache) a DuckDB connection with the data registered
+
+        For CSVs that have not been materialized yet, main_table is a view
+        over read_csv_auto so DuckDB can push LIMIT/projection into the
+        file scan without pandas ever loading it.
+        """
+        if self._duck is None:
+            conn = duckdb.connect()
+            if self._data is None and self.file_type == 'csv':
+                path = self.file_path.replace("'", "''")
+                conn.execute(
+                    f"CREATE VIEW main_table AS SELECT * FROM read_csv_auto('{path}')"
+                )
+            else:
+                conn.register('main_table', self.data)
+            self._duck = conn
+        return self._duck
     
-    def get_schema(self) -> Dict[str, Any]:
-        """Get file schema information"""
-        if not self.is_connected or self.data is None:
+    def get_schema(self, refresh: bool = False) -> Dict[str, Any]:
+        """Get file schema information (refresh is a no-op for files)"""
+        if not self.is_connected:
             return {}
-        
+
+        # For CSVs, infer the schema from the sample so listing columns does
+        # not force a full parse of the file
+        if self._data is None and self._sample is not None:
+            df = self._sample
+            row_count = self._count_csv_rows()
+        else:
+            df = self.data
+            if df is None:
+                return {}
+            row_count = len(df)
+
+        # One vectorized pass per statistic rather than a per-column
+        # Series scan inside the comprehension
+        dtypes = {col: str(dtype) for col, dtype in df.dtypes.items()}
+        nulls = df.isna().any().to_dict()
+
         schema_info = {
             'main_table': {
                 'columns': [
                     {
                         'name': col,
-                        'type': str(self.data[col].dtype),
-                        'nullable': bool(self.data[col].isnull().any()),
+                        'type': dtypes[col],
+                        'nullable': bool(nulls[col]),
                         'is_sensitive': self._is_sensitive_field(col),
                         'is_person_identifier': self._is_person_identifier(col)
                     }
-                    for col in self.data.columns
+                    for col in df.columns
                 ],
-                'row_count': len(self.data)
+                'row_count': row_count
             }
         }
-        
+
         return schema_info
+
+    def _count_csv_rows(self) -> int:
+        """Count CSV data rows without parsing the file into a DataFrame"""
+        try:
+            with open(self.file_path, 'rb') as f:
+                return max(sum(1 for _ in f) - 1, 0)
+        except Exception as e:
+            logger.error("Error counting rows in %s: %s", self.file_path, e)
+            return 0
     
-    def execute_query(self, query: str) -> pd.DataFrame:
+    def execute_query(self, query: str, params=None) -> pd.DataFrame:
         """Execute query on file data (limited query support)"""
-        if not self.is_connected or self.data is None:
+        if not self.is_connected:
             return pd.DataFrame()
-        
+
+        # Prefer DuckDB when available: a real vectorized SQL engine over the
+        # in-memory DataFrame instead of the string-splitting parser below.
+        # Parameters bind natively (DuckDB spells named placeholders $name,
+        # the shared contract uses :name) rather than being pasted into the
+        # SQL as text
+        if duckdb is not None:
+            try:
+                conn = self._get_duckdb()
+                if params:
+                    duck_query = query
+                    for key in params:
+                        duck_query = duck_query.replace(f":{key}", f"${key}")
+                    return conn.execute(duck_query, params).fetch_df()
+                return conn.execute(query).fetch_df()
+            except Exception as e:
+                logger.warning("DuckDB query failed, falling back to simple parser: %s", e)
+
+        # Resolve bound parameters into literals for the simple parser below,
+        # doubling quotes so a quote in a value cannot break out of the literal
+        if params:
+            for key, value in params.items():
+                query = query.replace(f":{key}", "'" + str(value).replace("'", "''") + "'")
+
+        # Preview-style queries against an unloaded CSV can push the limit
+        # and projection into the read instead of parsing the whole file
+        if self._data is None and self.file_type == 'csv':
+            pushed = self._try_csv_pushdown(query)
+            if pushed is not None:
+                return pushed
+
+        if self.data is None:
+            return pd.DataFrame()
+
         try:
             # Simple query parsing for file data
             query_lower = query.lower()
@@ -81,7 +215,7 @@ class FileConnector(BaseConnector):
                 select_part = query[query_lower.find('select')+6:query_lower.find('from')].strip()
                 
                 if select_part == '*':
-                    result_df = self.data.copy()
+                    result_df = self.data
                 else:
                     columns = [col.strip() for col in select_part.split(',')]
                     available_columns = [col for col in columns if col in self.data.columns]
@@ -107,12 +241,42 @@ class FileConnector(BaseConnector):
                 
                 return result_df
             else:
-                return self.data.copy()
-                
+                # Callers treat query results as read-only, so hand back the
+                # loaded frame instead of duplicating the whole file
+                return self.data
+
         except Exception as e:
-            print(f"Error executing query on file: {e}")
-            return self.data.copy()
+            logger.error("Error executing query on file: %s", e)
+            return self.data
     
+    def _try_csv_pushdown(self, query: str) -> Optional[pd.DataFrame]:
+        """Serve simple SELECT ... LIMIT N queries straight from the CSV reader
+
+        Only handles queries without a WHERE clause; filtering needs the
+        data in memory anyway.
+        """
+        try:
+            query_lower = query.lower()
+            if 'select' not in query_lower or 'from' not in query_lower or 'where' in query_lower:
+                return None
+
+            select_part = query[query_lower.find('select') + 6:query_lower.find('from')].strip()
+            usecols = None
+            if select_part != '*':
+                usecols = [col.strip() for col in select_part.split(',')]
+
+            nrows = None
+            if 'limit' in query_lower:
+                nrows = int(query[query_lower.find('limit') + 5:].strip())
+
+            if usecols is None and nrows is None:
+                return None
+
+            return pd.read_csv(self.file_path, usecols=usecols, nrows=nrows)
+        except Exception as e:
+            logger.warning("CSV pushdown failed, loading full file: %s", e)
+            return None
+
     def list_tables(self) -> List[str]:
         """List available tables (for files, just return main table)"""
         if self.is_connected:
@@ -120,71 +284,81 @@ class FileConnector(BaseConnector):
         return []
     
     def _parse_xml(self) -> pd.DataFrame:
-        """Parse XML file and convert to DataFrame"""
+        """Parse XML file and convert to DataFrame
+
+        Streams the file with iterparse and frees each record element after
+        reading it, so peak memory is one record rather than the whole tree.
+        """
         try:
-            tree = ET.parse(self.file_path)
-            root = tree.getroot()
-            
-            # Find all record elements
-            records = []
-            for record in root.findall('.//record') or root.findall('.//item') or root.findall('.//row'):
-                record_data = {}
-                for child in record:
-                    record_data[child.tag] = child.text
-                records.append(record_data)
-            
-            if records:
-                return pd.DataFrame(records)
-            else:
-                # If no record structure found, try to parse as flat XML
-                data = {}
-                for elem in root.iter():
-                    if elem.text and elem.text.strip():
-                        data[elem.tag] = elem.text.strip()
-                return pd.DataFrame([data])
-                
+            # Collect per tag so 'record' still wins over 'item'/'row' as in
+            # the old findall priority order
+            records_by_tag = {'record': [], 'item': [], 'row': []}
+
+            for _, elem in ET.iterparse(self.file_path, events=("end",)):
+                if elem.tag in records_by_tag:
+                    records_by_tag[elem.tag].append(
+                        {child.tag: child.text for child in elem}
+                    )
+                    elem.clear()
+
+            for tag in ('record', 'item', 'row'):
+                if records_by_tag[tag]:
+                    return pd.DataFrame.from_records(records_by_tag[tag])
+
+            # If no record structure found, try to parse as flat XML
+            root = ET.parse(self.file_path).getroot()
+            data = {}
+            for elem in root.iter():
+                if elem.text and elem.text.strip():
+                    data[elem.tag] = elem.text.strip()
+            return pd.DataFrame([data])
+
         except Exception as e:
-            print(f"Error parsing XML: {e}")
+            logger.error("Error parsing XML: %s", e)
             return pd.DataFrame()
     
     def _is_sensitive_field(self, column_name: str) -> bool:
         """Check if a column contains sensitive data"""
-        column_lower = column_name.lower()
-        sensitive_fields = ['password', 'ssn', 'credit_card', 'phone', 'email', 'address', 'salary']
-        return any(sensitive in column_lower for sensitive in sensitive_fields)
-    
+        return is_sensitive_column(column_name)
+
     def _is_person_identifier(self, column_name: str) -> bool:
         """Check if a column can be used to identify persons"""
-        column_lower = column_name.lower()
-        person_identifiers = ['name', 'first', 'last', 'full', 'person', 'user', 'customer', 'client', 'id', 'customerid', 'customer_id', 'userid', 'user_id']
-        return any(identifier in column_lower for identifier in person_identifiers)
+        return is_person_identifier_column(column_name)
     
-    def search_person_records(self, identifier: str, tables: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+    def search_person_records(self, identifier: str, tables: Optional[List[str]] = None,
+                              limit: Optional[int] = None) -> Dict[str, pd.DataFrame]:
         """Search for person-related records in file data"""
         if not self.is_connected or self.data is None:
             return {}
         
         results = {}
-        
-        # Find person identifier columns
-        person_columns = []
-        for col in self.data.columns:
-            if self._is_person_identifier(col):
-                person_columns.append(col)
-        
-        if person_columns:
-            # Search in person identifier columns
-            mask = None
-            for col in person_columns:
-                col_mask = self.data[col].astype(str).str.contains(identifier, case=False, na=False)
-                if mask is None:
-                    mask = col_mask
-                else:
-                    mask = mask | col_mask
-            
-            if mask is not None and mask.any():
+
+        # Search in the cached string views of the person identifier columns
+        # and reduce the per-column hits with one vectorized OR
+        person_col_str = self._get_person_column_strings()
+
+        if person_col_str:
+            masks = [
+                col.str.contains(identifier, case=False, na=False, regex=False)
+                for col in person_col_str.values()
+            ]
+            mask = np.logical_or.reduce(masks)
+
+            if mask.any():
                 filtered_df = self.data[mask]
+                if limit is not None:
+                    filtered_df = filtered_df.head(limit)
                 filtered_df = self.filter_sensitive_fields(filtered_df, 'main_table')
                 results['main_table'] = filtered_df
-        
+
         return results
+
+    def _get_person_column_strings(self) -> Dict[str, pd.Series]:
+        """Get (and cache) string views of the person identifier columns"""
+        if self._person_col_str is None:
+            self._person_col_str = {
+                col: self.data[col].astype("string")
+                for col in self.data.columns
+                if self._is_person_identifier(col)
+            }
+        return self._person_col_str
@@ -1,51 +1,96 @@
+import logging
 import pandas as pd
 from sqlalchemy import create_engine, text, inspect
-from typing import Dict, List, Any
-from .base import BaseConnector
+from sqlalchemy.engine import Engine
+from typing import Dict, List, Any, Optional
+from .base import BaseConnector, query_result_cache, make_query_cache_key
+from ._matchers import is_sensitive_column, is_person_identifier_column
 from config import Config
 
+logger = logging.getLogger(__name__)
+
+# Cache of engines keyed by connection string so repeated connects reuse the
+# same connection pool instead of paying the TCP+auth handshake per query
+_ENGINE_CACHE: Dict[str, Engine] = {}
+
+# Introspected schemas keyed by connection string; schemas change rarely but
+# get_schema is called on every dashboard render
+_SCHEMA_CACHE: Dict[str, Dict[str, Any]] = {}
+
+def get_engine(connection_string: str) -> Engine:
+    """Get (or create) a pooled engine for a connection string"""
+    engine = _ENGINE_CACHE.get(connection_string)
+    if engine is None:
+        engine = _ENGINE_CACHE.setdefault(
+            connection_string,
+            create_engine(
+                connection_string,
+                pool_size=10,
+                max_overflow=20,
+                pool_pre_ping=True,
+                pool_recycle=1800,
+                pool_use_lifo=True,
+                future=True
+            )
+        )
+    return engine
+
 class SQLConnector(BaseConnector):
     """SQL database connector for PostgreSQL and MySQL"""
-    
+
     def __init__(self, connection_string: str, name: str, db_type: str):
         super().__init__(connection_string, name)
         self.db_type = db_type
         self.engine = None
         self.inspector = None
-    
+
     def connect(self) -> bool:
         """Connect to SQL database"""
         try:
-            self.engine = create_engine(self.connection_string)
+            self.engine = get_engine(self.connection_string)
             self.inspector = inspect(self.engine)
             self.is_connected = True
             return True
         except Exception as e:
-            print(f"Error connecting to database: {e}")
+            logger.error("Error connecting to database: %s", e)
             self.is_connected = False
             return False
-    
+
     def disconnect(self):
-        """Disconnect from database"""
-        if self.engine:
-            self.engine.dispose()
+        """Disconnect from database (pooled connections stay open for reuse)"""
         self.is_connected = False
+
+    @classmethod
+    def shutdown_all(cls):
+        """Dispose all cached engines (e.g. on application shutdown)"""
+        for engine in _ENGINE_CACHE.values():
+            engine.dispose()
+        _ENGINE_CACHE.clear()
     
-    def get_schema(self) -> Dict[str, Any]:
-        """Get database schema information"""
+    def get_schema(self, refresh: bool = False) -> Dict[str, Any]:
+        """Get database schema information (cached per connection string)"""
         if not self.is_connected:
             return {}
-        
+
+        if not refresh:
+            cached = _SCHEMA_CACHE.get(self.connection_string)
+            if cached is not None:
+                return cached
+
         schema_info = {}
-        
+
         try:
-            tables = self.inspector.get_table_names()
-            
-            for table in tables:
-                columns = self.inspector.get_columns(table)
-                primary_keys = self.inspector.get_pk_constraint(table)
-                foreign_keys = self.inspector.get_foreign_keys(table)
-                
+            # Fetch columns for all tables in one introspection round trip
+            # instead of per-table information_schema queries
+            all_columns = self.inspector.get_multi_columns()
+            all_pks = self.inspector.get_multi_pk_constraint()
+            all_fks = self.inspector.get_multi_foreign_keys()
+
+            for key, columns in all_columns.items():
+                table = key[1]
+                primary_keys = all_pks.get(key, {})
+                foreign_keys = all_fks.get(key, [])
+
                 schema_info[table] = {
                     'columns': [
                         {
@@ -61,26 +106,54 @@ class SQLConnector(BaseConnector):
                     'primary_keys': primary_keys.get('constrained_columns', []),
                     'foreign_keys': foreign_keys
                 }
-                
+
+            _SCHEMA_CACHE[self.connection_string] = schema_info
+
         except Exception as e:
-            print(f"Error getting schema: {e}")
-        
+            logger.error("Error getting schema: %s", e)
+
         return schema_info
     
-    def execute_query(self, query: str) -> pd.DataFrame:
-        """Execute SQL query and return results as DataFrame"""
+    def execute_query(self, query: str, params=None) -> pd.DataFrame:
+        """Execute SQL query with optional bound parameters"""
         if not self.is_connected:
             return pd.DataFrame()
-        
+
         try:
+            cache_key = make_query_cache_key(self.name, query, params)
+            cached = query_result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
             with self.engine.connect() as connection:
-                result = connection.execute(text(query))
-                df = pd.DataFrame(result.fetchall(), columns=result.keys())
+                # read_sql_query builds the frame straight from the DBAPI
+                # cursor, skipping the intermediate list of Row objects
+                df = pd.read_sql_query(text(query), connection, params=params or {})
+                query_result_cache.put(cache_key, df)
                 return df
         except Exception as e:
-            print(f"Error executing query: {e}")
+            logger.error("Error executing query: %s", e)
             return pd.DataFrame()
     
+    def execute_query_iter(self, query: str, params=None, chunksize: int = 10000):
+        """Execute a query and yield results in DataFrame chunks
+
+        Uses a server-side cursor (stream_results) so peak memory is bounded
+        by one chunk instead of the full result set.
+        """
+        if not self.is_connected:
+            return
+
+        try:
+            with self.engine.connect() as connection:
+                streaming = connection.execution_options(stream_results=True)
+                for chunk in pd.read_sql_query(
+                    text(query), streaming, params=params or {}, chunksize=chunksize
+                ):
+                    yield chunk
+        except Exception as e:
+            logger.error("Error executing streaming query: %s", e)
+
     def list_tables(self) -> List[str]:
         """List available tables"""
         if not self.is_connected:
@@ -89,20 +162,87 @@ class SQLConnector(BaseConnector):
         try:
             return self.inspector.get_table_names()
         except Exception as e:
-            print(f"Error listing tables: {e}")
+            logger.error("Error listing tables: %s", e)
             return []
     
+    def _search_uses_ilike(self) -> bool:
+        """Postgres searches use ILIKE so pg_trgm GIN indexes can serve them"""
+        return self.db_type == 'postgres'
+
+    def ensure_trgm_indexes(self, tables: Optional[List[str]] = None) -> int:
+        """Create trigram GIN indexes for person columns (Postgres only)
+
+        One-shot DDL helper for admins: makes the ILIKE person searches an
+        index lookup instead of a sequential scan. Returns the number of
+        indexes ensured.
+        """
+        if not self.is_connected or self.db_type != 'postgres':
+            return 0
+
+        created = 0
+        try:
+            schema = self.get_schema()
+            if tables is None:
+                tables = list(schema.keys())
+
+            with self.engine.begin() as connection:
+                connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                for table in tables:
+                    for col in self._person_identifier_columns_from_schema(schema, table):
+                        connection.execute(text(
+                            f"CREATE INDEX IF NOT EXISTS ix_trgm_{table}_{col} "
+                            f"ON {table} USING gin ({col} gin_trgm_ops)"
+                        ))
+                        created += 1
+        except Exception as e:
+            logger.warning("Error creating trigram indexes: %s", e)
+
+        return created
+
     def _is_sensitive_field(self, column_name: str) -> bool:
         """Check if a column contains sensitive data"""
-        column_lower = column_name.lower()
-        return any(sensitive in column_lower for sensitive in Config.SENSITIVE_FIELDS)
-    
+        return is_sensitive_column(column_name)
+
     def _is_person_identifier(self, column_name: str) -> bool:
         """Check if a column can be used to identify persons"""
-        column_lower = column_name.lower()
-        person_identifiers = ['name', 'first', 'last', 'full', 'person', 'user', 'customer', 'client', 'id']
-        return any(identifier in column_lower for identifier in person_identifiers)
+        return is_person_identifier_column(column_name)
     
+    def get_all_row_counts(self, tables: List[str], exact: bool = False) -> Dict[str, int]:
+        """Get row counts for many tables in a single query
+
+        By default reads planner statistics (pg_class.reltuples on Postgres,
+        information_schema.TABLES on MySQL), which is O(1) per table instead
+        of a full scan. Pass exact=True to run one UNION ALL of COUNT(*)
+        queries when precise numbers matter.
+        """
+        if not self.is_connected or not tables:
+            return {}
+
+        try:
+            if exact:
+                query = " UNION ALL ".join(
+                    f"SELECT '{table}' AS table_name, COUNT(*) AS row_count FROM {table}"
+                    for table in tables
+                )
+                df = self.execute_query(query)
+            elif self.db_type == 'postgres':
+                df = self.execute_query(
+                    "SELECT relname AS table_name, reltuples::bigint AS row_count "
+                    "FROM pg_class WHERE relname = ANY(:names)",
+                    {"names": tables}
+                )
+            else:  # mysql
+                df = self.execute_query(
+                    "SELECT TABLE_NAME AS table_name, TABLE_ROWS AS row_count "
+                    "FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()"
+                )
+
+            counts = dict(zip(df['table_name'], df['row_count'].astype(int)))
+            return {table: counts.get(table, 0) for table in tables}
+        except Exception as e:
+            logger.error("Error getting row counts: %s", e)
+            return {}
+
     def get_table_row_count(self, table_name: str) -> int:
         """Get row count for a table"""
         if not self.is_connected:
@@ -113,7 +253,7 @@ class SQLConnector(BaseConnector):
             df = self.execute_query(query)
             return df['count'].iloc[0] if not df.empty else 0
         except Exception as e:
-            print(f"Error getting row count for {table_name}: {e}")
+            logger.error("Error getting row count for %s: %s", table_name, e)
             return 0
     
     def get_table_sample(self, table_name: str, limit: int = 10) -> pd.DataFrame:
@@ -126,5 +266,5 @@ class SQLConnector(BaseConnector):
             df = self.execute_query(query)
             return self.filter_sensitive_fields(df, table_name)
         except Exception as e:
-            print(f"Error getting sample from {table_name}: {e}")
+            logger.error("Error getting sample from %s: %s", table_name, e)
             return pd.DataFrame()
@@ -1,48 +1,131 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
+from functools import cached_property, lru_cache
 import os
 from config import Config
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite for the metadata workload (many small writes)
+
+    WAL halves the fsyncs per commit and lets readers proceed during
+    writes; synchronous=NORMAL is safe under WAL.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
 class DatabaseManager:
-    def __init__(self):
-        self.engine = None
-        self.SessionLocal = None
-        self._initialize_database()
-    
-    def _initialize_database(self):
-        """Initialize SQLite database for the application"""
+    """Manages the SQLite metadata database for the application
+
+    Engine and session factory are created lazily on first use, so importing
+    this module (which Streamlit does on every rerun of every page) costs
+    nothing until a session is actually requested.
+    """
+
+    def _create_engine(self):
+        """Build an engine on the metadata database with the shared tuning"""
         # Create data directory if it doesn't exist
         os.makedirs(Config.DATA_DIR, exist_ok=True)
-        
+
         # SQLite database for application metadata
         database_url = f"sqlite:///{os.path.join(Config.DATA_DIR, 'data_retrieval.db')}"
-        
-        self.engine = create_engine(
+
+        engine = create_engine(
             database_url,
-            connect_args={"check_same_thread": False},
+            connect_args={"check_same_thread": False, "timeout": 30},
             poolclass=StaticPool,
             echo=False
         )
-        
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
-    
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+        return engine
+
+    @cached_property
+    def engine(self):
+        """Lazily initialized SQLAlchemy engine"""
+        return self._create_engine()
+
+    @cached_property
+    def audit_engine(self):
+        """Engine reserved for the background audit writer
+
+        StaticPool pins one shared DBAPI connection per engine, so a
+        COMMIT issued by the audit drain thread on the main engine would
+        also commit whatever a UI session has pending on that same
+        connection (and make its later rollback a no-op). The writer
+        therefore gets its own connection; WAL serializes the two
+        writers with the 30s busy timeout.
+        """
+        return self._create_engine()
+
+    @cached_property
+    def SessionLocal(self):
+        """Lazily initialized session factory
+
+        expire_on_commit=False keeps committed objects readable after the
+        session closes (services return detached rows to the UI) and avoids
+        the post-commit SELECT reload per attribute access.
+        """
+        return sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            bind=self.engine
+        )
+
+    @cached_property
+    def AuditSessionLocal(self):
+        """Session factory bound to the audit writer's engine"""
+        return sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            bind=self.audit_engine
+        )
+
     def get_session(self):
         """Get database session"""
         return self.SessionLocal()
-    
+
     def create_tables(self):
         """Create all database tables"""
         from .models import Base
         Base.metadata.create_all(bind=self.engine)
-    
+
     def close(self):
         """Close database connection"""
-        if self.engine:
+        if 'engine' in self.__dict__:
             self.engine.dispose()
+            del self.__dict__['engine']
+        if 'audit_engine' in self.__dict__:
+            self.audit_engine.dispose()
+            del self.__dict__['audit_engine']
+        self.__dict__.pop('SessionLocal', None)
+        self.__dict__.pop('AuditSessionLocal', None)
+
+@lru_cache(maxsize=1)
+def get_db_manager() -> DatabaseManager:
+    """Get the process-wide database manager"""
+    return DatabaseManager()
 
 # Global database manager instance
-db_manager = DatabaseManager()
+db_manager = get_db_manager()
+
+def SessionLocal():
+    """Session factory for `with SessionLocal() as db:` blocks
+
+    Sessions are context managers, so callers get close-on-exit without
+    the generator/finally boilerplate of get_db(). Connections come from
+    the shared pooled engine either way.
+    """
+    return db_manager.get_session()
+
+def AuditSession():
+    """Session on the audit writer's dedicated connection"""
+    return db_manager.AuditSessionLocal()
 
 def get_db():
     """Dependency to get database session"""
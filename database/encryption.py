@@ -0,0 +1,63 @@
+import base64
+import hashlib
+import logging
+import os
+from functools import lru_cache
+
+from sqlalchemy import Text
+from sqlalchemy.types import TypeDecorator
+from cryptography.fernet import Fernet, InvalidToken
+
+# Encryption-at-rest for connection strings. The key comes from the
+# DATADOCK_DS_KEY environment variable; any secret string works, it is
+# stretched to a Fernet key with SHA-256. Without a key the column is a
+# plaintext passthrough so development setups keep working.
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = 'enc$'
+
+@lru_cache(maxsize=1)
+def _get_fernet():
+    """Build the process-wide Fernet instance from the environment key"""
+    secret = os.getenv('DATADOCK_DS_KEY')
+    if not secret:
+        return None
+    digest = hashlib.sha256(secret.encode('utf-8')).digest()
+    return Fernet(base64.urlsafe_b64encode(digest))
+
+@lru_cache(maxsize=256)
+def _decrypt_cached(token: str) -> str:
+    """Decrypt a ciphertext once per process
+
+    DataSource rows are re-read on every search, so the hot connection
+    strings decrypt once and come from this cache afterwards.
+    """
+    fernet = _get_fernet()
+    return fernet.decrypt(token.encode('ascii')).decode('utf-8')
+
+class EncryptedText(TypeDecorator):
+    """Text column stored encrypted at rest
+
+    Ciphertext is prefixed so legacy plaintext rows written before
+    encryption was enabled still load; they are re-encrypted the next
+    time they are saved.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        fernet = _get_fernet()
+        if value is None or fernet is None:
+            return value
+        return _PREFIX + fernet.encrypt(value.encode('utf-8')).decode('ascii')
+
+    def process_result_value(self, value, dialect):
+        if value is None or not value.startswith(_PREFIX):
+            return value
+        try:
+            return _decrypt_cached(value[len(_PREFIX):])
+        except (InvalidToken, AttributeError, TypeError) as e:
+            logger.error("Error decrypting connection string: %s", e)
+            return None
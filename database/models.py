@@ -1,90 +1,204 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
-import json
+from typing import Any, Dict, List, Optional
 
-Base = declarative_base()
+from sqlalchemy import BigInteger, Integer, String, DateTime, Text, Boolean, Enum, ForeignKey, JSON, Identity, Index, LargeBinary, Table, Column, func, select, lambda_stmt, bindparam
+from sqlalchemy.dialects.postgresql import JSONB, INET
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+
+from .encryption import EncryptedText
+
+class Base(DeclarativeBase):
+    pass
+
+# On Postgres store JSON as JSONB (binary, indexable, no per-read re-parse);
+# SQLite and others keep the generic JSON type
+JSONColumn = JSON().with_variant(JSONB(), 'postgresql')
+
+# Closed vocabularies as string enums: Postgres stores them as 4-byte enum
+# OIDs with exact cardinality stats, other dialects get a CHECK constraint,
+# and invalid writes fail at the database instead of lingering as bad text.
+# Values stay plain strings in Python, so callers compare as before.
+# 64-bit keys for the append-only tables: audit volume outgrows 2^31 long
+# before it outgrows disk. SQLite keeps plain INTEGER so the column stays a
+# rowid alias.
+BigIntPK = BigInteger().with_variant(Integer(), 'sqlite')
+
+RoleEnum = Enum('super_admin', 'admin', 'user',
+                name='user_role', create_constraint=True, validate_strings=True)
+DataSourceTypeEnum = Enum('postgres', 'mysql', 'csv', 'json', 'xml', 'logs',
+                          name='data_source_type', create_constraint=True, validate_strings=True)
+ExportTypeEnum = Enum('csv', 'pdf',
+                      name='export_type', create_constraint=True, validate_strings=True)
 
 class User(Base):
     __tablename__ = 'users'
-    
-    id = Column(Integer, primary_key=True)
-    username = Column(String(50), unique=True, nullable=False)
-    password_hash = Column(String(255), nullable=False)
-    role = Column(String(20), nullable=False)  # super_admin, admin, user
-    full_name = Column(String(100), nullable=False)
-    email = Column(String(100), unique=True, nullable=False)
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    last_login = Column(DateTime)
-    
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    username: Mapped[str] = mapped_column(String(50), unique=True)
+    password_hash: Mapped[bytes] = mapped_column(LargeBinary)  # raw hash bytes (bcrypt ~60, argon2 ~95+); binary compare, no collation
+    role: Mapped[str] = mapped_column(RoleEnum)
+    full_name: Mapped[str] = mapped_column(String(100))
+    email: Mapped[str] = mapped_column(String(320), unique=True)  # RFC 5321 max length
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    last_login: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    # Case-insensitive lookup indexes for login/uniqueness checks
+    __table_args__ = (
+        Index('ix_users_username_lower', func.lower(username)),
+        Index('ix_users_email_lower', func.lower(email)),
+    )
+
     # Relationships
-    audit_logs = relationship("AuditLog", back_populates="user")
+    audit_logs: Mapped[List["AuditLog"]] = relationship(back_populates="user", passive_deletes=True)
 
 class DataSource(Base):
     __tablename__ = 'data_sources'
-    
-    id = Column(Integer, primary_key=True)
-    name = Column(String(100), nullable=False)
-    type = Column(String(20), nullable=False)  # postgres, mysql, csv, json, xml, logs
-    connection_string = Column(Text, nullable=False)
-    schema_info = Column(JSON)  # Store schema information
-    is_active = Column(Boolean, default=True)
-    created_by = Column(Integer, ForeignKey('users.id'))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    last_updated = Column(DateTime, default=datetime.utcnow)
-    
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(100))
+    type: Mapped[str] = mapped_column(DataSourceTypeEnum)
+    connection_string: Mapped[str] = mapped_column(EncryptedText)  # Encrypted at rest when DATADOCK_DS_KEY is set
+    schema_info: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONColumn)  # Store schema information
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    created_by: Mapped[Optional[int]] = mapped_column(ForeignKey('users.id', ondelete='SET NULL'), index=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    last_updated: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Serves "active data sources by type" listings
+    __table_args__ = (
+        Index('ix_data_sources_type_active', 'type', 'is_active'),
+    )
+
     # Relationships
-    schema_mappings = relationship("SchemaMapping", back_populates="data_source")
+    schema_mappings: Mapped[List["SchemaMapping"]] = relationship(back_populates="data_source", passive_deletes=True)
 
 class SchemaMapping(Base):
     __tablename__ = 'schema_mappings'
-    
-    id = Column(Integer, primary_key=True)
-    data_source_id = Column(Integer, ForeignKey('data_sources.id'))
-    table_name = Column(String(100), nullable=False)
-    column_name = Column(String(100), nullable=False)
-    data_type = Column(String(50), nullable=False)
-    is_sensitive = Column(Boolean, default=False)
-    is_person_identifier = Column(Boolean, default=False)  # For person-related searches
-    category = Column(String(50))  # For tagging/categorization
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    data_source_id: Mapped[Optional[int]] = mapped_column(ForeignKey('data_sources.id', ondelete='CASCADE'))
+    table_name: Mapped[str] = mapped_column(String(100))
+    column_name: Mapped[str] = mapped_column(String(100))
+    data_type: Mapped[str] = mapped_column(String(50))
+    is_sensitive: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    is_person_identifier: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)  # For person-related searches
+    category: Mapped[Optional[str]] = mapped_column(String(50))  # For tagging/categorization
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    # Serves "person identifier columns for a data source" lookups
+    __table_args__ = (
+        Index('ix_schema_mappings_source_person', 'data_source_id', 'is_person_identifier'),
+    )
+
     # Relationships
-    data_source = relationship("DataSource", back_populates="schema_mappings")
+    data_source: Mapped[Optional["DataSource"]] = relationship(back_populates="schema_mappings", lazy='selectin')
 
 class AuditLog(Base):
     __tablename__ = 'audit_logs'
-    
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
-    action = Column(String(100), nullable=False)  # login, search, export, etc.
-    details = Column(JSON)  # Store action details
-    ip_address = Column(String(45))
-    timestamp = Column(DateTime, default=datetime.utcnow)
-    
+
+    id: Mapped[int] = mapped_column(BigIntPK, Identity(start=1, cache=50), primary_key=True)
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey('users.id', ondelete='SET NULL'))
+    action: Mapped[str] = mapped_column(String(100))  # login, search, export, etc.
+    details: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONColumn)  # Store action details
+    # INET on Postgres: fixed-width storage and CIDR operators instead of
+    # 45-byte text comparisons
+    ip_address: Mapped[Optional[str]] = mapped_column(String(45).with_variant(INET(), 'postgresql'))
+    timestamp: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    # Composite B-trees for equality-plus-range filters; BRIN (Postgres
+    # only) as the cheap backstop for pure time-range scans over an
+    # append-only, monotonically increasing column
+    __table_args__ = (
+        Index('ix_audit_logs_user_ts', 'user_id', 'timestamp'),
+        Index('ix_audit_logs_action_ts', 'action', 'timestamp'),
+        Index('ix_audit_logs_ts_brin', 'timestamp',
+              postgresql_using='brin',
+              postgresql_with={'pages_per_range': 32}),
+    )
+
     # Relationships
-    user = relationship("User", back_populates="audit_logs")
+    user: Mapped[Optional["User"]] = relationship(back_populates="audit_logs", lazy='selectin')
+
+# Link table for which data sources a search touched. Aggregations such as
+# "top data sources this week" become a plain GROUP BY over an indexed FK
+# instead of expanding a JSON array per row.
+search_session_ds = Table(
+    'search_session_ds', Base.metadata,
+    Column('session_id', BigIntPK, ForeignKey('search_sessions.id', ondelete='CASCADE'), primary_key=True),
+    Column('data_source_id', ForeignKey('data_sources.id', ondelete='CASCADE'), primary_key=True),
+)
 
 class SearchSession(Base):
     __tablename__ = 'search_sessions'
-    
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
-    search_query = Column(String(500), nullable=False)
-    results_count = Column(Integer, default=0)
-    data_sources_queried = Column(JSON)  # List of data sources used
-    filters_applied = Column(JSON)  # Search filters
-    created_at = Column(DateTime, default=datetime.utcnow)
+
+    id: Mapped[int] = mapped_column(BigIntPK, Identity(start=1, cache=50), primary_key=True)
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey('users.id', ondelete='SET NULL'))
+    search_query: Mapped[str] = mapped_column(String(500))
+    results_count: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    data_sources_queried: Mapped[Optional[List[Any]]] = mapped_column(JSONColumn)  # Names, kept for display
+    filters_applied: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONColumn)  # Search filters
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    data_sources: Mapped[List["DataSource"]] = relationship(
+        secondary=search_session_ds, lazy='selectin', passive_deletes=True
+    )
+
+    # Serves the per-user search history listing
+    __table_args__ = (
+        Index('ix_search_sessions_user_created', 'user_id', 'created_at'),
+        Index('ix_search_sessions_created_brin', 'created_at',
+              postgresql_using='brin',
+              postgresql_with={'pages_per_range': 32}),
+    )
 
 class ExportRecord(Base):
     __tablename__ = 'export_records'
-    
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
-    search_session_id = Column(Integer, ForeignKey('search_sessions.id'))
-    export_type = Column(String(20), nullable=False)  # csv, pdf
-    file_path = Column(String(500), nullable=False)
-    records_count = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
+
+    id: Mapped[int] = mapped_column(Identity(start=1, cache=50), primary_key=True)
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey('users.id', ondelete='SET NULL'))
+    search_session_id: Mapped[Optional[int]] = mapped_column(BigIntPK, ForeignKey('search_sessions.id', ondelete='SET NULL'), index=True)
+    export_type: Mapped[str] = mapped_column(ExportTypeEnum)
+    file_path: Mapped[str] = mapped_column(String(260))  # Windows MAX_PATH
+    records_count: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    # Serves the per-user export history listing
+    __table_args__ = (
+        Index('ix_export_records_user_created', 'user_id', 'created_at'),
+        Index('ix_export_records_created_brin', 'created_at',
+              postgresql_using='brin',
+              postgresql_with={'pages_per_range': 32}),
+    )
+
+# --- Precompiled statements for hot paths -----------------------------------
+# These queries run on nearly every request with only bind values changing;
+# lambda_stmt memoizes the statement construction and compilation so a cache
+# hit skips the Python-side SQL build entirely.
+
+def active_user_by_username_stmt():
+    """Login lookup: active user by username"""
+    return lambda_stmt(
+        lambda: select(User).where(
+            User.username == bindparam('u'),
+            User.is_active == True
+        )
+    )
+
+def user_by_username_stmt():
+    """Uniqueness check: any user by username"""
+    return lambda_stmt(lambda: select(User).where(User.username == bindparam('u')))
+
+def user_by_email_stmt():
+    """Uniqueness check: any user by email"""
+    return lambda_stmt(lambda: select(User).where(User.email == bindparam('e')))
+
+def recent_search_sessions_stmt():
+    """Per-user search history, newest first"""
+    return lambda_stmt(
+        lambda: select(SearchSession)
+        .where(SearchSession.user_id == bindparam('uid'))
+        .order_by(SearchSession.created_at.desc())
+        .limit(bindparam('lim'))
+    )
@@ -2,10 +2,247 @@ import streamlit as st
 import pandas as pd
 from utils.auth import get_current_user, require_auth
 from services.search_service import SearchService
-from services.export_service import ExportService
 from services.data_source_service import DataSourceService
-import plotly.express as px
-import plotly.graph_objects as go
+from collections import namedtuple
+from typing import Optional
+
+# Lightweight cacheable snapshot of a DataSource row (ORM instances are
+# not safe to share across cached reruns)
+DataSourceRow = namedtuple('DataSourceRow', ['id', 'name', 'type', 'created_at', 'last_updated', 'schema_info'])
+
+UserRow = namedtuple('UserRow', ['id', 'username', 'role', 'full_name', 'email', 'created_at', 'last_login'])
+
+AuditLogRow = namedtuple('AuditLogRow', ['timestamp', 'user_id', 'action', 'details', 'ip_address'])
+
+@st.cache_data(ttl=15, show_spinner=False)
+def _cached_audit_logs(action, limit) -> list:
+    """Audit logs for display, cached briefly so scrolling doesn't re-query"""
+    from utils.audit import get_audit_logs
+    return [
+        AuditLogRow(l.timestamp, l.user_id, l.action, l.details, l.ip_address)
+        for l in get_audit_logs(action=action, limit=limit)
+    ]
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _active_users_cached() -> list:
+    """Active users for the management listing, cached across reruns"""
+    from database.models import User
+    from database.connection import get_db
+    db = next(get_db())
+    try:
+        return [
+            UserRow(u.id, u.username, u.role, u.full_name, u.email, u.created_at, u.last_login)
+            for u in db.query(User).filter(User.is_active == True).all()
+        ]
+    finally:
+        db.close()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _get_data_sources_cached(offset: int = 0, limit: Optional[int] = None) -> list:
+    """A page of data sources for display, cached across script reruns
+
+    Streamlit reruns the whole script on every widget interaction; this
+    keeps those reruns from each paying a catalog query. The management
+    listing and schema picker need every source (there is no pager to
+    reach the rest), so the default is unbounded; callers that render a
+    page pass offset/limit.
+    """
+    return [
+        DataSourceRow(ds.id, ds.name, ds.type, ds.created_at, ds.last_updated, ds.schema_info)
+        for ds in DataSourceService.get_all_data_sources(offset, limit)
+    ]
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _schema_table(ds_id: int, table_name: str, columns: list):
+    """Schema columns as an Arrow table, cached per (data source, table)
+
+    st.dataframe takes Arrow input zero-copy, so building pa.Table
+    straight from the column dicts skips pandas dtype inference and the
+    pandas-to-Arrow conversion; schema_info only changes on refresh, so
+    the build happens once per schema instead of once per rerun.
+    """
+    import pyarrow as pa
+    return pa.Table.from_pylist(columns)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_global_search(query: str, user_id: int) -> dict:
+    """Memoized global search keyed on (query, user_id)
+
+    Repeat submissions of the same term skip the full fan-out across
+    every configured data source; keying on user_id keeps
+    permission-filtered results per user.
+    """
+    return SearchService.global_search(query, user_id)
+
+# Theme stylesheets are static; keep them as module constants so reruns
+# emit a prebuilt string instead of reallocating and re-parsing it
+_DARK_CSS = """
+    <style>
+        .stApp {
+            background-color: #0E1117;
+            color: #FAFAFA;
+        }
+        .stMarkdown, .stText {
+            color: #FAFAFA !important;
+        }
+        .stButton button {
+            background-color: #262730;
+            color: #FAFAFA;
+            border: 1px solid #4A4A4A;
+        }
+        .stTextInput input {
+            background-color: #262730;
+            color: #FAFAFA;
+        }
+        .stSelectbox select {
+            background-color: #262730;
+            color: #FAFAFA;
+        }
+    </style>
+"""
+
+_LIGHT_CSS = """
+    <style>
+        .stApp {
+            background-color: #FFFFFF;
+            color: #000000;
+        }
+        .stMarkdown, .stText {
+            color: #000000 !important;
+        }
+        .stButton button {
+            background-color: #F0F2F6;
+            color: #000000;
+            border: 1px solid #E0E0E0;
+        }
+    </style>
+"""
+
+_RENDER_WINDOW = 500
+
+def render_df(df: pd.DataFrame, key: str):
+    """Render a result DataFrame, windowed for large tables
+
+    Streamlit serializes every row passed to st.dataframe over the
+    websocket on each rerun, so big results get sliced to a
+    slider-selected window and only O(window) bytes travel per rerun.
+    """
+    if len(df) > _RENDER_WINDOW:
+        start = st.slider(
+            "Rows",
+            0, len(df) - _RENDER_WINDOW,
+            step=_RENDER_WINDOW,
+            key=f"{key}_slider"
+        )
+        st.caption(f"Showing rows {start} to {start + _RENDER_WINDOW} of {len(df)}")
+        df = df.iloc[start:start + _RENDER_WINDOW]
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+def _render_search_results(results, search_query, user, show_export=False):
+    """Render a global search result dict
+
+    Shared by the quick-search and global-search pages so pagination,
+    grouping and caching behavior stays in one place; show_export adds
+    the CSV/PDF/provenance buttons.
+    """
+    st.success(f"Found {results['total_records']} records across {len(results['data_sources_queried'])} data sources")
+    
+    # Display results in a clear, organized way
+    st.subheader("🔍 Search Results")
+    
+    # Show summary
+    st.info(f"📊 **Summary:** {results['total_records']} records found in {len(results['data_sources_queried'])} data sources")
+    
+    # Drop empty tables/sources in one pass so the render loop only
+    # touches live data
+    nonempty = {
+        ds: {t: df for t, df in tables.items() if not df.empty}
+        for ds, tables in results["results"].items()
+    }
+    nonempty = {ds: tables for ds, tables in nonempty.items() if tables}
+    
+    # Display results by data source
+    for data_source_name, tables in nonempty.items():
+        st.markdown(f"### 📁 **{data_source_name}**")
+        
+        for table_name, df in tables.items():
+            st.markdown(f"#### 📋 **{table_name}** ({len(df)} records)")
+            
+            # Display the data in a clean table
+            render_df(df, key=f"{data_source_name}_{table_name}")
+            
+            # Show record count
+            st.caption(f"📈 Showing {len(df)} records from {table_name}")
+    
+    # Group results by person if possible; stash in session state so
+    # expander toggles and theme changes after a search reuse the
+    # grouping instead of recomputing it
+    grouped_key = hash((search_query, user.id))
+    if st.session_state.get('grouped_key') != grouped_key:
+        st.session_state.grouped = SearchService.group_results_as_frame(results["results"])
+        st.session_state.grouped_key = grouped_key
+    grouped = st.session_state.grouped
+    
+    if not grouped.empty:
+        by_person = grouped.groupby('person_id', sort=False)
+        st.subheader("👥 Grouped by Person")
+        st.info(f"Found {by_person.ngroups} unique persons across all records")
+        
+        for person_id, sub in by_person:
+            # Collapsed by default: the browser mounts each person's
+            # table only when opened
+            with st.expander(f"👤 **{person_id}** ({len(sub)} records)"):
+                # O(1) slice of the long-format frame per person; no
+                # per-record DataFrame construction
+                st.dataframe(
+                    sub.drop(columns=['person_id']),
+                    use_container_width=True,
+                    hide_index=True
+                )
+    
+    if show_export:
+        from services.export_service import ExportService
+        
+        # Combine the nested results once per search and stash in session
+        # state; CSV and PDF exports then share one flattened frame
+        combined_key = ('export_combined', grouped_key)
+        if st.session_state.get('export_combined_key') != combined_key:
+            st.session_state.export_combined = ExportService.combine_search_results(results["results"])
+            st.session_state.export_combined_key = combined_key
+        combined_df = st.session_state.export_combined
+        
+        # Export section (outside of form)
+        st.subheader("📤 Export Options")
+        st.markdown("Export your search results in different formats:")
+        
+        export_col1, export_col2, export_col3 = st.columns(3)
+        
+        with export_col1:
+            if st.button("📥 Export to CSV", key="export_csv_global"):
+                with st.spinner("Exporting to CSV..."):
+                    success, filepath = ExportService.export_search_results(results["results"], "csv", user.id, results.get("search_session_id"), combined_df=combined_df)
+                    if success:
+                        st.success(f"✅ Exported to: {filepath}")
+                    else:
+                        st.error(f"❌ Export failed: {filepath}")
+        
+        with export_col2:
+            if st.button("📄 Export to PDF", key="export_pdf_global"):
+                with st.spinner("Exporting to PDF..."):
+                    success, filepath = ExportService.export_search_results(results["results"], "pdf", user.id, results.get("search_session_id"), combined_df=combined_df)
+                    if success:
+                        st.success(f"✅ Exported to: {filepath}")
+                    else:
+                        st.error(f"❌ Export failed: {filepath}")
+        
+        with export_col3:
+            if st.button("📊 Export Person Provenance", key="export_provenance_global"):
+                with st.spinner("Exporting person provenance..."):
+                    success, filepath = ExportService.export_person_provenance(results["results"], user.id, results.get("search_session_id"))
+                    if success:
+                        st.success(f"✅ Exported to: {filepath}")
+                    else:
+                        st.error(f"❌ Export failed: {filepath}")
 
 def dashboard_page():
     """Main dashboard page"""
@@ -30,6 +267,8 @@ def dashboard_page():
         st.markdown("---")
         st.markdown("### Quick Actions")
         if st.button("🔄 Refresh Data Sources"):
+            _cached_global_search.clear()
+            _get_data_sources_cached.clear()
             st.rerun()
         
         if st.button("📊 View Statistics"):
@@ -48,48 +287,7 @@ def dashboard_page():
                 st.session_state.theme = 'light'
         
         # Apply theme
-        if st.session_state.theme == 'dark':
-            st.markdown("""
-                <style>
-                    .stApp {
-                        background-color: #0E1117;
-                        color: #FAFAFA;
-                    }
-                    .stMarkdown, .stText {
-                        color: #FAFAFA !important;
-                    }
-                    .stButton button {
-                        background-color: #262730;
-                        color: #FAFAFA;
-                        border: 1px solid #4A4A4A;
-                    }
-                    .stTextInput input {
-                        background-color: #262730;
-                        color: #FAFAFA;
-                    }
-                    .stSelectbox select {
-                        background-color: #262730;
-                        color: #FAFAFA;
-                    }
-                </style>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown("""
-                <style>
-                    .stApp {
-                        background-color: #FFFFFF;
-                        color: #000000;
-                    }
-                    .stMarkdown, .stText {
-                        color: #000000 !important;
-                    }
-                    .stButton button {
-                        background-color: #F0F2F6;
-                        color: #000000;
-                        border: 1px solid #E0E0E0;
-                    }
-                </style>
-            """, unsafe_allow_html=True)
+        st.markdown(_DARK_CSS if st.session_state.theme == 'dark' else _LIGHT_CSS, unsafe_allow_html=True)
         
         st.markdown("---")
         if st.button("🚪 Logout"):
@@ -112,12 +310,13 @@ def dashboard_page():
     elif page == "Settings":
         show_settings(user)
 
+@st.fragment
 def show_dashboard_content(user):
     """Show dashboard content"""
     st.header("📊 System Overview")
     
     # Get system statistics
-    data_sources = DataSourceService.get_all_data_sources()
+    data_sources = _get_data_sources_cached()
     total_data_sources = len(data_sources)
     
     # Create metrics
@@ -143,81 +342,41 @@ def show_dashboard_content(user):
         
         if search_button and search_query:
             with st.spinner("Searching across all data sources..."):
-                results = SearchService.global_search(search_query, user.id)
-                
-                # Debug: Show raw results
-                st.write("**Debug Info:**")
-                st.write(f"Total records: {results.get('total_records', 0)}")
-                st.write(f"Data sources queried: {results.get('data_sources_queried', [])}")
-                st.write(f"Results keys: {list(results.get('results', {}).keys())}")
-                
-                if results.get("total_records", 0) > 0:
-                    st.success(f"Found {results['total_records']} records across {len(results['data_sources_queried'])} data sources")
-                    
-                    # Display results in a clear, organized way
-                    st.subheader("🔍 Search Results")
-                    
-                    # Show summary
-                    st.info(f"📊 **Summary:** {results['total_records']} records found in {len(results['data_sources_queried'])} data sources")
-                    
-                    # Display results by data source
+                # Stored under a different key than the form: widget keys
+                # are owned by Streamlit and cannot be assigned after the
+                # widget instantiates
+                st.session_state.quick_search_results = (search_query, _cached_global_search(search_query, user.id))
+    
+    # Results live in a placeholder fed from session state, so they
+    # survive unrelated reruns and rebuild only when a search ran
+    results_slot = st.empty()
+    if st.session_state.get('quick_search_results'):
+        search_query, results = st.session_state.quick_search_results
+        with results_slot.container():
+            # Debug: Show raw results (one markdown call = one
+            # websocket delta instead of four)
+            st.markdown(
+                f"**Debug Info:**  \n"
+                f"Total records: {results.get('total_records', 0)}  \n"
+                f"Data sources queried: {results.get('data_sources_queried', [])}  \n"
+                f"Results keys: {list(results.get('results', {}).keys())}"
+            )
+            
+            if results.get("total_records", 0) > 0:
+                _render_search_results(results, search_query, user)
+            else:
+                # Check if there are any results but they might not be grouped properly
+                if results.get("results") and any(len(tables) > 0 for tables in results["results"].values()):
+                    st.warning("Records found but could not be grouped by person. Showing raw results:")
+                    st.subheader("📋 Raw Search Results")
                     for data_source_name, tables in results["results"].items():
-                        st.markdown(f"### 📁 **{data_source_name}**")
-                        
+                        st.write(f"**Data Source:** {data_source_name}")
                         for table_name, df in tables.items():
                             if not df.empty:
-                                st.markdown(f"#### 📋 **{table_name}** ({len(df)} records)")
-                                
-                                # Display the data in a clean table
-                                st.dataframe(
-                                    df,
-                                    use_container_width=True,
-                                    hide_index=True,
-                                    column_config={
-                                        col: st.column_config.TextColumn(
-                                            col,
-                                            help=f"Column: {col}",
-                                            max_chars=50
-                                        ) for col in df.columns
-                                    }
-                                )
-                                
-                                # Show record count
-                                st.caption(f"📈 Showing {len(df)} records from {table_name}")
-                    
-                    # Group results by person if possible
-                    person_groups = SearchService.group_results_by_person(results["results"])
-                    
-                    if person_groups:
-                        st.subheader("👥 Grouped by Person")
-                        st.info(f"Found {len(person_groups)} unique persons across all records")
-                        
-                        for person_id, records in person_groups.items():
-                            with st.expander(f"👤 **{person_id}** ({len(records)} records)", expanded=True):
-                                for i, record in enumerate(records, 1):
-                                    st.markdown(f"**Record {i}:** {record['data_source']} > {record['table']}")
-                                    
-                                    # Display record data in a clean format
-                                    record_df = pd.DataFrame([record['record']])
-                                    st.dataframe(
-                                        record_df,
-                                        use_container_width=True,
-                                        hide_index=True
-                                    )
-                                    st.divider()
+                                st.write(f"**Table:** {table_name} ({len(df)} records)")
+                                st.dataframe(df.head(10), use_container_width=True)
                 else:
-                    # Check if there are any results but they might not be grouped properly
-                    if results.get("results") and any(len(tables) > 0 for tables in results["results"].values()):
-                        st.warning("Records found but could not be grouped by person. Showing raw results:")
-                        st.subheader("📋 Raw Search Results")
-                        for data_source_name, tables in results["results"].items():
-                            st.write(f"**Data Source:** {data_source_name}")
-                            for table_name, df in tables.items():
-                                if not df.empty:
-                                    st.write(f"**Table:** {table_name} ({len(df)} records)")
-                                    st.dataframe(df.head(10), use_container_width=True)
-                    else:
-                        st.warning("No records found matching your search criteria.")
+                    st.warning("No records found matching your search criteria.")
     
     # Recent activity
     st.header("📈 Recent Activity")
@@ -251,6 +410,7 @@ def show_dashboard_content(user):
     - XML files
     """)
 
+@st.fragment
 def show_global_search(user):
     """Show global search page"""
     st.header("🔍 Global Search")
@@ -271,98 +431,20 @@ def show_global_search(user):
         
         if search_button and search_query:
             with st.spinner("Searching across all data sources..."):
-                results = SearchService.global_search(search_query, user.id)
-                
-                if results.get("total_records", 0) > 0:
-                    st.success(f"Found {results['total_records']} records across {len(results['data_sources_queried'])} data sources")
-                    
-                    # Display results in a clear, organized way
-                    st.subheader("🔍 Search Results")
-                    
-                    # Show summary
-                    st.info(f"📊 **Summary:** {results['total_records']} records found in {len(results['data_sources_queried'])} data sources")
-                    
-                    # Display results by data source
-                    for data_source_name, tables in results["results"].items():
-                        st.markdown(f"### 📁 **{data_source_name}**")
-                        
-                        for table_name, df in tables.items():
-                            if not df.empty:
-                                st.markdown(f"#### 📋 **{table_name}** ({len(df)} records)")
-                                
-                                # Display the data in a clean table
-                                st.dataframe(
-                                    df,
-                                    use_container_width=True,
-                                    hide_index=True,
-                                    column_config={
-                                        col: st.column_config.TextColumn(
-                                            col,
-                                            help=f"Column: {col}",
-                                            max_chars=50
-                                        ) for col in df.columns
-                                    }
-                                )
-                                
-                                # Show record count
-                                st.caption(f"📈 Showing {len(df)} records from {table_name}")
-                    
-                    # Group results by person if possible
-                    person_groups = SearchService.group_results_by_person(results["results"])
-                    
-                    if person_groups:
-                        st.subheader("👥 Grouped by Person")
-                        st.info(f"Found {len(person_groups)} unique persons across all records")
-                        
-                        for person_id, records in person_groups.items():
-                            with st.expander(f"👤 **{person_id}** ({len(records)} records)", expanded=True):
-                                for i, record in enumerate(records, 1):
-                                    st.markdown(f"**Record {i}:** {record['data_source']} > {record['table']}")
-                                    
-                                    # Display record data in a clean format
-                                    record_df = pd.DataFrame([record['record']])
-                                    st.dataframe(
-                                        record_df,
-                                        use_container_width=True,
-                                        hide_index=True
-                                    )
-                                    st.divider()
-                    
-                    # Export section (outside of form)
-                    st.subheader("📤 Export Options")
-                    st.markdown("Export your search results in different formats:")
-                    
-                    export_col1, export_col2, export_col3 = st.columns(3)
-                    
-                    with export_col1:
-                        if st.button("📥 Export to CSV", key="export_csv_global"):
-                            with st.spinner("Exporting to CSV..."):
-                                success, filepath = ExportService.export_search_results(results["results"], "csv", user.id, results.get("search_session_id"))
-                                if success:
-                                    st.success(f"✅ Exported to: {filepath}")
-                                else:
-                                    st.error(f"❌ Export failed: {filepath}")
-                    
-                    with export_col2:
-                        if st.button("📄 Export to PDF", key="export_pdf_global"):
-                            with st.spinner("Exporting to PDF..."):
-                                success, filepath = ExportService.export_search_results(results["results"], "pdf", user.id, results.get("search_session_id"))
-                                if success:
-                                    st.success(f"✅ Exported to: {filepath}")
-                                else:
-                                    st.error(f"❌ Export failed: {filepath}")
-                    
-                    with export_col3:
-                        if st.button("📊 Export Person Provenance", key="export_provenance_global"):
-                            with st.spinner("Exporting person provenance..."):
-                                success, filepath = ExportService.export_person_provenance(results["results"], user.id, results.get("search_session_id"))
-                                if success:
-                                    st.success(f"✅ Exported to: {filepath}")
-                                else:
-                                    st.error(f"❌ Export failed: {filepath}")
-                else:
-                    st.warning("No records found matching your search criteria.")
+                st.session_state.global_search = (search_query, _cached_global_search(search_query, user.id))
+    
+    # Placeholder fed from session state: results (and their export
+    # buttons) persist across reruns instead of vanishing after submit
+    results_slot = st.empty()
+    if st.session_state.get('global_search'):
+        search_query, results = st.session_state.global_search
+        with results_slot.container():
+            if results.get("total_records", 0) > 0:
+                _render_search_results(results, search_query, user, show_export=True)
+            else:
+                st.warning("No records found matching your search criteria.")
 
+@st.fragment
 def show_data_sources(user):
     """Show data sources management"""
     st.header("📁 Data Sources")
@@ -397,30 +479,37 @@ def show_data_sources(user):
                     "password": password
                 }
             else:
-                # File upload for CSV, JSON, XML data sources
+                # File upload for CSV, JSON, XML data sources; the file is
+                # written to disk only on submit, so widget interactions
+                # after picking a file don't each rewrite it
                 uploaded_file = st.file_uploader(
                     f"Upload {source_type.upper()} file",
                     type=[source_type],
                     help=f"Select a {source_type.upper()} file to upload"
                 )
-                
-                if uploaded_file is not None:
+                config = None
+            
+            if st.form_submit_button("Add Data Source"):
+                if source_type not in ["postgres", "mysql"] and uploaded_file is not None:
                     # Save the uploaded file to the data directory
                     import os
+                    import shutil
+                    import uuid
                     from config import Config
                     
                     # Create data directory if it doesn't exist
                     os.makedirs(Config.DATA_DIR, exist_ok=True)
                     
                     # Generate a unique filename
-                    import uuid
                     file_extension = source_type.lower()
                     unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
                     file_path = os.path.join(Config.DATA_DIR, unique_filename)
                     
-                    # Save the uploaded file
+                    # Save in 1 MiB chunks: O(1) peak memory instead of
+                    # materializing the whole upload
+                    uploaded_file.seek(0)
                     with open(file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
+                        shutil.copyfileobj(uploaded_file, f, length=1 << 20)
                     
                     st.success(f"File uploaded successfully: {uploaded_file.name}")
                     
@@ -429,14 +518,12 @@ def show_data_sources(user):
                         "type": source_type,
                         "file_path": file_path
                     }
-                else:
-                    config = None
-            
-            if st.form_submit_button("Add Data Source"):
+                
                 if name:
                     if source_type in ["postgres", "mysql"] or config is not None:
                         success, message = DataSourceService.create_data_source(config, user.id)
                         if success:
+                            _get_data_sources_cached.clear()
                             st.success(message)
                             st.rerun()
                         else:
@@ -448,7 +535,7 @@ def show_data_sources(user):
     
     # List existing data sources
     st.subheader("📋 Existing Data Sources")
-    data_sources = DataSourceService.get_all_data_sources()
+    data_sources = _get_data_sources_cached()
     
     if data_sources:
         for ds in data_sources:
@@ -471,6 +558,11 @@ def show_data_sources(user):
                     if st.button("🗑️ Delete", key=f"delete_{ds.id}"):
                         success, message = DataSourceService.delete_data_source(ds.id, user.id)
                         if success:
+                            _get_data_sources_cached.clear()
+                            # Drop memoized searches too: their TTL would
+                            # otherwise keep serving records from the
+                            # deleted source for up to 5 minutes
+                            _cached_global_search.clear()
                             st.success(message)
                             st.rerun()
                         else:
@@ -478,6 +570,7 @@ def show_data_sources(user):
     else:
         st.info("No data sources configured yet.")
 
+@st.fragment
 def show_schema_management(user):
     """Show schema management"""
     st.header("🗂️ Schema Management")
@@ -487,7 +580,7 @@ def show_schema_management(user):
         return
     
     # Select data source
-    data_sources = DataSourceService.get_all_data_sources()
+    data_sources = _get_data_sources_cached()
     if not data_sources:
         st.info("No data sources available. Please add data sources first.")
         return
@@ -501,6 +594,9 @@ def show_schema_management(user):
         if st.button("🔄 Refresh Schema"):
             success, message = DataSourceService.refresh_schema(selected_ds.id, user.id)
             if success:
+                _get_data_sources_cached.clear()
+                _cached_global_search.clear()
+                _schema_table.clear()
                 st.success(message)
                 st.rerun()
             else:
@@ -513,12 +609,13 @@ def show_schema_management(user):
                     st.write(f"**Columns:** {len(table_info.get('columns', []))}")
                     
                     # Display columns
-                    columns_df = pd.DataFrame(table_info.get('columns', []))
-                    if not columns_df.empty:
-                        st.dataframe(columns_df, use_container_width=True)
+                    cols = table_info.get('columns', [])
+                    if cols:
+                        st.dataframe(_schema_table(selected_ds.id, table_name, cols), use_container_width=True)
         else:
             st.info("No schema information available.")
 
+@st.fragment
 def show_audit_logs(user):
     """Show audit logs"""
     st.header("📝 Audit Logs")
@@ -538,18 +635,21 @@ def show_audit_logs(user):
     
     # Get audit logs
     action = None if action_filter == "All" else action_filter
-    logs = get_audit_logs(action=action, limit=limit)
+    logs = _cached_audit_logs(action, limit)
     
     if logs:
         st.subheader(f"Recent Audit Logs ({len(logs)} entries)")
         
         for log in logs:
-            with st.expander(f"{log.timestamp.strftime('%Y-%m-%d %H:%M:%S')} - {log.action}"):
-                st.write(f"**User ID:** {log.user_id}")
-                st.write(f"**Action:** {log.action}")
-                st.write(f"**IP Address:** {log.ip_address or 'N/A'}")
+            # One markdown delta per log instead of four st.write calls
+            body = (
+                f"**User ID:** {log.user_id}  \n"
+                f"**Action:** {log.action}  \n"
+                f"**IP Address:** {log.ip_address or 'N/A'}"
+            )
+            with st.expander(f"{log.timestamp:%Y-%m-%d %H:%M:%S} - {log.action}"):
+                st.markdown(body)
                 if log.details:
-                    st.write("**Details:**")
                     st.json(log.details)
     else:
         st.info("No audit logs found.")
@@ -569,6 +669,7 @@ def show_audit_logs(user):
             filepath = export_audit_logs(format='json')
             st.success(f"Exported to: {filepath}")
 
+@st.fragment
 def show_user_management(user):
     """Show user management"""
     st.header("👥 User Management")
@@ -593,6 +694,7 @@ def show_user_management(user):
                     from utils.auth import create_user
                     success, message = create_user(username, password, full_name, email, role, user.id)
                     if success:
+                        _active_users_cached.clear()
                         st.success(message)
                         st.rerun()
                     else:
@@ -602,33 +704,38 @@ def show_user_management(user):
     
     # List users
     st.subheader("📋 User List")
+    users = _active_users_cached()
+    
+    if users:
+        for u in users:
+            with st.expander(f"👤 {u.username} ({u.role})"):
+                st.write(f"**Full Name:** {u.full_name}")
+                st.write(f"**Email:** {u.email}")
+                st.write(f"**Role:** {u.role}")
+                st.write(f"**Created:** {u.created_at.strftime('%Y-%m-%d %H:%M')}")
+                st.write(f"**Last Login:** {u.last_login.strftime('%Y-%m-%d %H:%M') if u.last_login else 'Never'}")
+                
+                if u.id != user.id:  # Can't delete yourself
+                    if st.button("🗑️ Deactivate User", key=f"deactivate_{u.id}"):
+                        _deactivate_user(u.id)
+                        _active_users_cached.clear()
+                        st.success(f"User {u.username} deactivated.")
+                        st.rerun()
+    else:
+        st.info("No users found.")
+
+def _deactivate_user(user_id: int):
+    """Soft-delete a user"""
     from database.models import User
     from database.connection import get_db
-    
     db = next(get_db())
     try:
-        users = db.query(User).filter(User.is_active == True).all()
-        
-        if users:
-            for u in users:
-                with st.expander(f"👤 {u.username} ({u.role})"):
-                    st.write(f"**Full Name:** {u.full_name}")
-                    st.write(f"**Email:** {u.email}")
-                    st.write(f"**Role:** {u.role}")
-                    st.write(f"**Created:** {u.created_at.strftime('%Y-%m-%d %H:%M')}")
-                    st.write(f"**Last Login:** {u.last_login.strftime('%Y-%m-%d %H:%M') if u.last_login else 'Never'}")
-                    
-                    if u.id != user.id:  # Can't delete yourself
-                        if st.button("🗑️ Deactivate User", key=f"deactivate_{u.id}"):
-                            u.is_active = False
-                            db.commit()
-                            st.success(f"User {u.username} deactivated.")
-                            st.rerun()
-        else:
-            st.info("No users found.")
+        db.query(User).filter(User.id == user_id).update({"is_active": False})
+        db.commit()
     finally:
         db.close()
 
+@st.fragment
 def show_settings(user):
     """Show settings page"""
     st.header("⚙️ Settings")
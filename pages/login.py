@@ -1,11 +1,22 @@
 import streamlit as st
-from utils.auth import authenticate_user, create_user
+from utils.auth import authenticate_user, create_user, cookie_manager, make_auth_token, verify_auth_token
 from config import Config
 
 def login_page():
     """Login page"""
     st.title("🔐 Data Retrieval System - Login")
     
+    # A browser refresh wipes session state; restore the login from the
+    # signed cookie (one primary-key lookup) instead of forcing a full
+    # username + bcrypt round-trip
+    cookies = cookie_manager()
+    if ('user' not in st.session_state
+            and not st.session_state.get('logged_out')
+            and cookies is not None and cookies.ready()):
+        restored = verify_auth_token(cookies.get('auth_token'))
+        if restored:
+            st.session_state['user'] = restored
+    
     # Check if user is already logged in
     if 'user' in st.session_state:
         st.success(f"Welcome back, {st.session_state['user'].full_name}!")
@@ -44,6 +55,12 @@ def login_page():
                 user = authenticate_user(username, password)
                 if user:
                     st.session_state['user'] = user
+                    st.session_state.pop('logged_out', None)
+                    if cookies is not None and cookies.ready():
+                        token = make_auth_token(user.id)
+                        if token:
+                            cookies['auth_token'] = token
+                            cookies.save()
                     st.success(f"Welcome, {user.full_name}!")
                     st.rerun()
                 else:
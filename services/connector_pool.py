@@ -0,0 +1,73 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from data_connectors.factory import ConnectorFactory
+
+# Pool of live connectors keyed by data source id. Every search used to
+# pay a full create/connect/disconnect cycle per call (TCP plus auth for
+# SQL sources, file reopen for the rest); here a released connector is
+# parked and handed to the next caller instead. Each connector is held
+# by one caller at a time, idle entries expire after a TTL, and a
+# connector whose caller raised is dropped rather than reused.
+
+_IDLE_TTL = 300
+_MAX_IDLE_PER_SOURCE = 4
+
+_lock = threading.Lock()
+_idle: Dict[int, List[tuple]] = {}
+
+
+class ConnectorUnavailable(Exception):
+    """Raised when a connector for a data source cannot connect"""
+
+
+def _disconnect_quietly(connector):
+    try:
+        connector.disconnect()
+    except Exception:
+        pass
+
+
+def _checkout(data_source_id):
+    """Pop a live idle connector for the source, discarding expired ones"""
+    with _lock:
+        stack = _idle.get(data_source_id)
+        while stack:
+            connector, expires_at = stack.pop()
+            if time.monotonic() < expires_at:
+                return connector
+            _disconnect_quietly(connector)
+    return None
+
+
+@contextmanager
+def acquire(data_source_id, config):
+    """Borrow a connected connector for the duration of a with block"""
+    connector = _checkout(data_source_id)
+    if connector is None:
+        connector = ConnectorFactory.create_connector(config)
+        if not connector.connect():
+            raise ConnectorUnavailable(f"Failed to connect to data source {data_source_id}")
+    try:
+        yield connector
+    except Exception:
+        # The connector may be in an undefined state; evict it
+        _disconnect_quietly(connector)
+        raise
+    else:
+        with _lock:
+            stack = _idle.setdefault(data_source_id, [])
+            if len(stack) < _MAX_IDLE_PER_SOURCE:
+                stack.append((connector, time.monotonic() + _IDLE_TTL))
+                return
+        _disconnect_quietly(connector)
+
+
+def invalidate(data_source_id):
+    """Drop pooled connectors for a source (call after config changes)"""
+    with _lock:
+        stack = _idle.pop(data_source_id, [])
+    for connector, _ in stack:
+        _disconnect_quietly(connector)
@@ -1,24 +1,130 @@
 import json
 import os
+import threading
+import time
+from functools import lru_cache
 from datetime import datetime
 from typing import Dict, List, Any, Optional
+from sqlalchemy import select, update, func
 from database.models import DataSource, SchemaMapping
-from database.connection import get_db
+from database.connection import SessionLocal
 from data_connectors.factory import ConnectorFactory
+from services import connector_pool
 from utils.audit import log_action
 from config import Config
 import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _loads(raw):
+    """Parse a stored JSON string with orjson when available"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+@lru_cache(maxsize=256)
+def parsed_config(raw: str) -> dict:
+    """Parsed connector config for a stored connection string
+
+    Keyed on the string itself, so an edited config is simply a new
+    cache entry and repeated searches stop re-parsing identical JSON.
+    Treat the returned dict as read-only.
+    """
+    return _loads(raw)
+
+# Process-local catalog of DataSource rows. They are read on every search to
+# resolve metadata but change rarely, so the per-request query collapses to a
+# dict lookup. Validity is probed with a single max(last_updated) fetch: the
+# onupdate trigger bumps it on any edit (including soft deletes) and inserts
+# stamp it, so any catalog change moves the version token.
+_catalog_lock = threading.Lock()
+_catalog_version = None
+_catalog = None
+_catalog_generation = 0
+
+def _load_catalog() -> Dict[int, DataSource]:
+    """Get the id -> DataSource map, rebuilding when the version token moves"""
+    global _catalog_version, _catalog
+    with SessionLocal() as db:
+        version = db.execute(select(func.max(DataSource.last_updated))).scalar()
+        with _catalog_lock:
+            if _catalog is not None and version == _catalog_version:
+                return _catalog
+        sources = db.execute(select(DataSource)).scalars().all()
+        with _catalog_lock:
+            _catalog = {ds.id: ds for ds in sources}
+            _catalog_version = version
+            return _catalog
+
+def invalidate_catalog_cache():
+    """Drop the cached catalog (call after any data-source write)"""
+    global _catalog_version, _catalog, _catalog_generation
+    with _catalog_lock:
+        _catalog_version = None
+        _catalog = None
+        _catalog_generation += 1
+
+def catalog_generation() -> int:
+    """Counter that moves on every data-source write
+
+    Callers caching anything derived from the catalog (e.g. search
+    results) fold this into their keys so source changes invalidate
+    those caches for free.
+    """
+    with _catalog_lock:
+        return _catalog_generation
+
+# Per-data-source locks serializing schema refreshes. Introspection is
+# expensive and the mapping rewrite is delete-then-insert, so two
+# concurrent refreshes of one source would duplicate the work and race
+# on the rows. In-process locks cover this single-server deployment; a
+# multi-server setup would need pg_advisory_xact_lock instead.
+_refresh_locks_guard = threading.Lock()
+_refresh_locks: Dict[int, threading.Lock] = {}
+
+# Completion time of the last successful refresh per source, used to
+# absorb the double-click/rerun burst. last_updated is unusable for
+# this: any edit or soft delete bumps it too.
+_last_refresh: Dict[int, float] = {}
+
+def _refresh_lock(data_source_id: int) -> threading.Lock:
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(data_source_id, threading.Lock())
+
 class DataSourceService:
     """Service for managing data sources"""
-    
+
     @staticmethod
     def _ensure_json_serializable(obj):
-        """Ensure object is JSON serializable by converting numpy types"""
+        """Ensure object is JSON serializable by converting numpy types
+
+        Schemas from JSON-backed connectors usually contain only native
+        types, so a cheap C-level dumps probe returns the object as-is
+        without rebuilding it. Only when that fails does the conversion
+        run: one orjson round trip (OPT_SERIALIZE_NUMPY) when available,
+        else a recursive Python walk.
+        """
+        try:
+            json.dumps(obj)
+            return obj
+        except (TypeError, ValueError):
+            pass
+        if orjson is not None:
+            return orjson.loads(orjson.dumps(
+                obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ))
+        return DataSourceService._convert_numpy(obj)
+
+    @staticmethod
+    def _convert_numpy(obj):
+        """Recursively replace numpy scalars and arrays with native types"""
         if isinstance(obj, dict):
-            return {key: DataSourceService._ensure_json_serializable(value) for key, value in obj.items()}
+            return {key: DataSourceService._convert_numpy(value) for key, value in obj.items()}
         elif isinstance(obj, list):
-            return [DataSourceService._ensure_json_serializable(item) for item in obj]
+            return [DataSourceService._convert_numpy(item) for item in obj]
         elif isinstance(obj, np.bool_):
             return bool(obj)
         elif isinstance(obj, np.integer):
@@ -29,242 +135,269 @@ class DataSourceService:
             return obj.tolist()
         else:
             return obj
-    
+
     @staticmethod
     def create_data_source(data_source_config: Dict[str, Any], created_by: int) -> tuple[bool, str]:
         """Create a new data source"""
-        db = next(get_db())
-        try:
-            # Test connection first
-            success, message = ConnectorFactory.test_connection(data_source_config)
-            if not success:
-                return False, f"Connection test failed: {message}"
-            
-            # Create connector to get schema
-            connector = ConnectorFactory.create_connector(data_source_config)
-            connector.connect()
-            schema_info = connector.get_schema()
-            connector.disconnect()
-            
-            # Ensure schema_info is JSON serializable
-            schema_info = DataSourceService._ensure_json_serializable(schema_info)
-            
-            # Create data source record
-            data_source = DataSource(
-                name=data_source_config['name'],
-                type=data_source_config['type'],
-                connection_string=json.dumps(data_source_config),
-                schema_info=schema_info,
-                created_by=created_by,
-                created_at=datetime.utcnow(),
-                last_updated=datetime.utcnow()
-            )
-            
-            db.add(data_source)
-            db.commit()
-            
-            # Create schema mappings
-            DataSourceService._create_schema_mappings(db, data_source.id, schema_info)
-            
-            # Log action
-            log_action(created_by, "create_data_source", {
-                "data_source_name": data_source_config['name'],
-                "data_source_type": data_source_config['type']
-            })
-            
-            return True, "Data source created successfully"
-            
-        except Exception as e:
-            db.rollback()
-            return False, f"Error creating data source: {str(e)}"
-        finally:
-            db.close()
-    
+        with SessionLocal() as db:
+            try:
+                # Test connection first
+                success, message = ConnectorFactory.test_connection(data_source_config)
+                if not success:
+                    return False, f"Connection test failed: {message}"
+
+                # Create connector to get schema
+                connector = ConnectorFactory.create_connector(data_source_config)
+                connector.connect()
+                schema_info = connector.get_schema()
+                connector.disconnect()
+
+                # Ensure schema_info is JSON serializable
+                schema_info = DataSourceService._ensure_json_serializable(schema_info)
+
+                # Create data source record
+                data_source = DataSource(
+                    name=data_source_config['name'],
+                    type=data_source_config['type'],
+                    connection_string=json.dumps(data_source_config),
+                    schema_info=schema_info,
+                    created_by=created_by,
+                    created_at=datetime.utcnow(),
+                    last_updated=datetime.utcnow()
+                )
+
+                db.add(data_source)
+                db.commit()
+
+                # Create schema mappings
+                DataSourceService._create_schema_mappings(db, data_source.id, schema_info)
+                invalidate_catalog_cache()
+
+                # Log action
+                log_action(created_by, "create_data_source", {
+                    "data_source_name": data_source_config['name'],
+                    "data_source_type": data_source_config['type']
+                })
+
+                return True, "Data source created successfully"
+
+            except Exception as e:
+                db.rollback()
+                return False, f"Error creating data source: {str(e)}"
+
     @staticmethod
-    def get_all_data_sources() -> List[DataSource]:
-        """Get all active data sources"""
-        db = next(get_db())
-        try:
-            return db.query(DataSource).filter(DataSource.is_active == True).all()
-        finally:
-            db.close()
-    
+    def get_all_data_sources(offset: int = 0, limit: Optional[int] = 50) -> List[DataSource]:
+        """Get a page of active data sources, ordered by id
+
+        limit=None returns everything; search needs the full set while
+        listings page through it.
+        """
+        active = sorted(
+            (ds for ds in _load_catalog().values() if ds.is_active),
+            key=lambda ds: ds.id
+        )
+        if limit is None:
+            return active[offset:]
+        return active[offset:offset + limit]
+
     @staticmethod
     def get_data_source_by_id(data_source_id: int) -> Optional[DataSource]:
         """Get data source by ID"""
-        db = next(get_db())
-        try:
-            return db.query(DataSource).filter(DataSource.id == data_source_id).first()
-        finally:
-            db.close()
-    
+        return _load_catalog().get(data_source_id)
+
+    @staticmethod
+    def get_data_sources_by_ids(data_source_ids: List[int]) -> List[DataSource]:
+        """Resolve several ids against one catalog snapshot"""
+        catalog = _load_catalog()
+        return [catalog[i] for i in data_source_ids if i in catalog]
+
     @staticmethod
     def update_data_source(data_source_id: int, updates: Dict[str, Any], updated_by: int) -> tuple[bool, str]:
         """Update data source"""
-        db = next(get_db())
-        try:
-            data_source = db.query(DataSource).filter(DataSource.id == data_source_id).first()
-            if not data_source:
-                return False, "Data source not found"
-            
-            # Update fields
-            for key, value in updates.items():
-                if hasattr(data_source, key):
-                    setattr(data_source, key, value)
-            
-            data_source.last_updated = datetime.utcnow()
-            db.commit()
-            
-            # Log action
-            log_action(updated_by, "update_data_source", {
-                "data_source_id": data_source_id,
-                "updates": updates
-            })
-            
-            return True, "Data source updated successfully"
-            
-        except Exception as e:
-            db.rollback()
-            return False, f"Error updating data source: {str(e)}"
-        finally:
-            db.close()
-    
+        with SessionLocal() as db:
+            try:
+                # Single UPDATE: no SELECT round-trip, no object to track
+                values = {k: v for k, v in updates.items() if hasattr(DataSource, k)}
+                values['last_updated'] = datetime.utcnow()
+                result = db.execute(
+                    update(DataSource).where(DataSource.id == data_source_id).values(**values)
+                )
+                if result.rowcount == 0:
+                    return False, "Data source not found"
+
+                db.commit()
+                invalidate_catalog_cache()
+                connector_pool.invalidate(data_source_id)
+
+                # Log action
+                log_action(updated_by, "update_data_source", {
+                    "data_source_id": data_source_id,
+                    "updates": updates
+                })
+
+                return True, "Data source updated successfully"
+
+            except Exception as e:
+                db.rollback()
+                return False, f"Error updating data source: {str(e)}"
+
     @staticmethod
     def delete_data_source(data_source_id: int, deleted_by: int) -> tuple[bool, str]:
         """Delete data source (soft delete)"""
-        db = next(get_db())
-        try:
-            data_source = db.query(DataSource).filter(DataSource.id == data_source_id).first()
-            if not data_source:
-                return False, "Data source not found"
-            
-            data_source.is_active = False
-            db.commit()
-            
-            # Log action
-            log_action(deleted_by, "delete_data_source", {
-                "data_source_id": data_source_id,
-                "data_source_name": data_source.name
-            })
-            
-            return True, "Data source deleted successfully"
-            
-        except Exception as e:
-            db.rollback()
-            return False, f"Error deleting data source: {str(e)}"
-        finally:
-            db.close()
-    
+        data_source = DataSourceService.get_data_source_by_id(data_source_id)
+        if not data_source:
+            return False, "Data source not found"
+
+        with SessionLocal() as db:
+            try:
+                db.execute(
+                    update(DataSource).where(DataSource.id == data_source_id)
+                    .values(is_active=False, last_updated=datetime.utcnow())
+                )
+                db.commit()
+                invalidate_catalog_cache()
+                connector_pool.invalidate(data_source_id)
+
+                # Log action
+                log_action(deleted_by, "delete_data_source", {
+                    "data_source_id": data_source_id,
+                    "data_source_name": data_source.name
+                })
+
+                return True, "Data source deleted successfully"
+
+            except Exception as e:
+                db.rollback()
+                return False, f"Error deleting data source: {str(e)}"
+
     @staticmethod
     def test_data_source_connection(data_source_id: int) -> tuple[bool, str]:
         """Test connection to data source"""
         data_source = DataSourceService.get_data_source_by_id(data_source_id)
         if not data_source:
             return False, "Data source not found"
-        
+
         try:
-            config = json.loads(data_source.connection_string)
+            config = parsed_config(data_source.connection_string)
             return ConnectorFactory.test_connection(config)
         except Exception as e:
             return False, f"Error testing connection: {str(e)}"
-    
+
     @staticmethod
     def refresh_schema(data_source_id: int, refreshed_by: int) -> tuple[bool, str]:
         """Refresh schema information for data source"""
         data_source = DataSourceService.get_data_source_by_id(data_source_id)
         if not data_source:
             return False, "Data source not found"
-        
+
+        with _refresh_lock(data_source_id):
+            # A call that waited here may find the work already done;
+            # skip if another refresh completed within the last few seconds
+            fresh = _last_refresh.get(data_source_id)
+            if fresh is not None and time.monotonic() - fresh < 5:
+                return True, "Schema refreshed successfully"
+            ok, message = DataSourceService._do_refresh_schema(data_source, data_source_id, refreshed_by)
+            if ok:
+                _last_refresh[data_source_id] = time.monotonic()
+            return ok, message
+
+    @staticmethod
+    def _do_refresh_schema(data_source, data_source_id: int, refreshed_by: int) -> tuple[bool, str]:
         try:
-            config = json.loads(data_source.connection_string)
-            connector = ConnectorFactory.create_connector(config)
-            connector.connect()
-            new_schema = connector.get_schema()
-            connector.disconnect()
-            
+            # Reuse the shared cached connector (one live connection per
+            # config) instead of a connect/disconnect cycle per refresh;
+            # refresh=True still bypasses the schema cache
+            from utils.cache import get_connector, cached_schema
+            connector = get_connector(data_source.connection_string)
+            new_schema = connector.get_schema(refresh=True)
+            cached_schema.clear()
+
             # Ensure schema_info is JSON serializable
             new_schema = DataSourceService._ensure_json_serializable(new_schema)
-            
+
             # Update schema
-            db = next(get_db())
-            data_source.schema_info = new_schema
-            data_source.last_updated = datetime.utcnow()
-            db.commit()
-            
-            # Update schema mappings
-            DataSourceService._create_schema_mappings(db, data_source_id, new_schema)
-            
+            with SessionLocal() as db:
+                db.query(DataSource).filter(DataSource.id == data_source_id).update({
+                    "schema_info": new_schema,
+                    "last_updated": datetime.utcnow()
+                })
+                db.commit()
+
+                # Update schema mappings
+                DataSourceService._create_schema_mappings(db, data_source_id, new_schema)
+                invalidate_catalog_cache()
+
             # Log action
             log_action(refreshed_by, "refresh_schema", {
                 "data_source_id": data_source_id,
                 "data_source_name": data_source.name
             })
-            
+
             return True, "Schema refreshed successfully"
-            
+
         except Exception as e:
             return False, f"Error refreshing schema: {str(e)}"
-        finally:
-            db.close()
-    
+
     @staticmethod
     def _create_schema_mappings(db, data_source_id: int, schema_info: Dict[str, Any]):
         """Create schema mappings for data source"""
-        # Remove existing mappings
-        db.query(SchemaMapping).filter(SchemaMapping.data_source_id == data_source_id).delete()
-        
-        # Create new mappings
-        for table_name, table_info in schema_info.items():
-            for column_info in table_info.get('columns', []):
-                mapping = SchemaMapping(
-                    data_source_id=data_source_id,
-                    table_name=table_name,
-                    column_name=column_info['name'],
-                    data_type=column_info['type'],
-                    is_sensitive=column_info.get('is_sensitive', False),
-                    is_person_identifier=column_info.get('is_person_identifier', False),
-                    category=column_info.get('category'),
-                    created_at=datetime.utcnow()
-                )
-                db.add(mapping)
-        
+        # Remove existing mappings; no SchemaMapping instances are held
+        # here, so skip the identity-map sync pass
+        db.query(SchemaMapping).filter(
+            SchemaMapping.data_source_id == data_source_id
+        ).delete(synchronize_session=False)
+
+        # Build all rows up front and bulk-insert in chunks: multi-row
+        # INSERTs with no per-row unit-of-work tracking. 500 rows stays
+        # under SQLite's 999-bind-parameter-per-statement limit.
+        now = datetime.utcnow()
+        rows = [
+            {
+                'data_source_id': data_source_id,
+                'table_name': table_name,
+                'column_name': column_info['name'],
+                'data_type': column_info['type'],
+                'is_sensitive': column_info.get('is_sensitive', False),
+                'is_person_identifier': column_info.get('is_person_identifier', False),
+                'category': column_info.get('category'),
+                'created_at': now,
+            }
+            for table_name, table_info in schema_info.items()
+            for column_info in table_info.get('columns', [])
+        ]
+        for start in range(0, len(rows), 500):
+            db.bulk_insert_mappings(SchemaMapping, rows[start:start + 500])
+
         db.commit()
-    
+
     @staticmethod
     def get_schema_mappings(data_source_id: int) -> List[SchemaMapping]:
         """Get schema mappings for data source"""
-        db = next(get_db())
-        try:
+        with SessionLocal() as db:
             return db.query(SchemaMapping).filter(SchemaMapping.data_source_id == data_source_id).all()
-        finally:
-            db.close()
-    
+
     @staticmethod
     def update_schema_mapping(mapping_id: int, updates: Dict[str, Any], updated_by: int) -> tuple[bool, str]:
         """Update schema mapping"""
-        db = next(get_db())
-        try:
-            mapping = db.query(SchemaMapping).filter(SchemaMapping.id == mapping_id).first()
-            if not mapping:
-                return False, "Schema mapping not found"
-            
-            # Update fields
-            for key, value in updates.items():
-                if hasattr(mapping, key):
-                    setattr(mapping, key, value)
-            
-            db.commit()
-            
-            # Log action
-            log_action(updated_by, "update_schema_mapping", {
-                "mapping_id": mapping_id,
-                "updates": updates
-            })
-            
-            return True, "Schema mapping updated successfully"
-            
-        except Exception as e:
-            db.rollback()
-            return False, f"Error updating schema mapping: {str(e)}"
-        finally:
-            db.close()
+        with SessionLocal() as db:
+            try:
+                values = {k: v for k, v in updates.items() if hasattr(SchemaMapping, k)}
+                result = db.execute(
+                    update(SchemaMapping).where(SchemaMapping.id == mapping_id).values(**values)
+                )
+                if result.rowcount == 0:
+                    return False, "Schema mapping not found"
+
+                db.commit()
+
+                # Log action
+                log_action(updated_by, "update_schema_mapping", {
+                    "mapping_id": mapping_id,
+                    "updates": updates
+                })
+
+                return True, "Schema mapping updated successfully"
+
+            except Exception as e:
+                db.rollback()
+                return False, f"Error updating schema mapping: {str(e)}"
@@ -1,33 +1,60 @@
+import io
+import logging
 import pandas as pd
 import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+    pacsv = None
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, LongTable, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 from database.models import ExportRecord
-from database.connection import get_db
+from database.connection import SessionLocal
 from utils.audit import log_action
 from config import Config
 
+logger = logging.getLogger(__name__)
+
 class ExportService:
     """Service for handling data exports"""
     
     @staticmethod
-    def export_to_csv(data: pd.DataFrame, filename: str, user_id: int, search_session_id: Optional[int] = None) -> tuple[bool, str]:
+    def export_to_csv(data: pd.DataFrame, filename: str, user_id: int, search_session_id: Optional[int] = None,
+                      _timestamp: Optional[str] = None) -> tuple[bool, str]:
         """Export data to CSV file"""
         try:
             # Create exports directory if it doesn't exist
             os.makedirs(Config.EXPORTS_DIR, exist_ok=True)
             
-            # Generate filename with timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            # Generate filename with timestamp (callers that already
+            # stamped one pass it through)
+            timestamp = _timestamp or datetime.now().strftime('%Y%m%d_%H%M%S')
             filepath = os.path.join(Config.EXPORTS_DIR, f"{filename}_{timestamp}.csv")
             
-            # Export to CSV
-            data.to_csv(filepath, index=False)
+            # Export to CSV; Arrow's C-level writer beats DataFrame.to_csv
+            # by a wide margin on large results
+            # Write to a temp path and publish with os.replace so a
+            # crashed export never leaves a partial .csv behind.
+            # chunksize caps the pandas writer's peak buffer at 50k
+            # rows instead of the whole frame
+            tmp_path = filepath + '.tmp'
+            if pacsv is not None:
+                try:
+                    pacsv.write_csv(pa.Table.from_pandas(data, preserve_index=False), tmp_path)
+                except Exception as e:
+                    logger.warning("Arrow CSV write failed, falling back to pandas: %s", e)
+                    data.to_csv(tmp_path, index=False, chunksize=50_000)
+            else:
+                data.to_csv(tmp_path, index=False, chunksize=50_000)
+            os.replace(tmp_path, filepath)
             
             # Create export record
             export_record = ExportService._create_export_record(
@@ -48,18 +75,24 @@ class ExportService:
             return False, f"Error exporting to CSV: {str(e)}"
     
     @staticmethod
-    def export_to_pdf(data: pd.DataFrame, filename: str, title: str, user_id: int, search_session_id: Optional[int] = None) -> tuple[bool, str]:
+    def export_to_pdf(data: pd.DataFrame, filename: str, title: str, user_id: int, search_session_id: Optional[int] = None,
+                      _timestamp: Optional[str] = None) -> tuple[bool, str]:
         """Export data to PDF file"""
         try:
             # Create exports directory if it doesn't exist
             os.makedirs(Config.EXPORTS_DIR, exist_ok=True)
             
-            # Generate filename with timestamp
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            # Stamp the operation once and derive both formats from it
+            now = datetime.now()
+            timestamp = _timestamp or now.strftime('%Y%m%d_%H%M%S')
             filepath = os.path.join(Config.EXPORTS_DIR, f"{filename}_{timestamp}.pdf")
             
-            # Create PDF document
-            doc = SimpleDocTemplate(filepath, pagesize=A4)
+            # Build the PDF in memory: ReportLab then makes many small
+            # writes against a buffer instead of the file, and the
+            # finished bytes land on disk as one write plus an atomic
+            # rename, so partial PDFs never appear in the exports dir
+            buf = io.BytesIO()
+            doc = SimpleDocTemplate(buf, pagesize=A4)
             story = []
             
             # Add title
@@ -76,7 +109,7 @@ class ExportService:
             
             # Add export information
             info_style = styles['Normal']
-            export_info = f"Exported on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>"
+            export_info = f"Exported on: {now:%Y-%m-%d %H:%M:%S}<br/>"
             export_info += f"Total Records: {len(data)}<br/>"
             export_info += f"Columns: {', '.join(data.columns.tolist())}"
             story.append(Paragraph(export_info, info_style))
@@ -84,20 +117,21 @@ class ExportService:
             
             # Convert DataFrame to table data
             if not data.empty:
-                # Prepare table data
-                table_data = [data.columns.tolist()]  # Header
-                
-                # Add data rows (limit to first 1000 rows for PDF)
                 max_rows = min(1000, len(data))
-                for _, row in data.head(max_rows).iterrows():
-                    table_data.append([str(val) if pd.notna(val) else '' for val in row])
-                
-                # Create table
-                table = Table(table_data)
-                table.setStyle(TableStyle([
+                sub = data.head(max_rows)
+
+                # Pre-size columns from a sample so ReportLab skips the
+                # measure-every-cell width pass
+                sample = sub.head(100).astype(str)
+                col_widths = [
+                    min(3 * inch, max(0.5 * inch,
+                                      len(str(col)) * 6 + int(sample.iloc[:, i].str.len().max() or 0) * 5))
+                    for i, col in enumerate(data.columns)
+                ]
+
+                header_style = TableStyle([
                     ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
                     ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
                     ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
                     ('FONTSIZE', (0, 0), (-1, 0), 10),
                     ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
@@ -108,9 +142,31 @@ class ExportService:
                     ('GRID', (0, 0), (-1, -1), 1, colors.black),
                     ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
                     ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ]))
-                
-                story.append(table)
+                ])
+                body_style = TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, -1), colors.beige),
+                    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+                    ('FONTSIZE', (0, 0), (-1, -1), 8),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ])
+
+                # Emit the table in 200-row chunks so only one chunk of
+                # stringified cells is held (and laid out) at a time
+                chunk_size = 200
+                for start in range(0, max_rows, chunk_size):
+                    chunk = sub.iloc[start:start + chunk_size]
+                    rows = chunk.where(chunk.notna(), '').astype(str).values.tolist()
+                    if start == 0:
+                        table = LongTable([data.columns.tolist()] + rows,
+                                          colWidths=col_widths, repeatRows=1)
+                        table.setStyle(header_style)
+                    else:
+                        table = LongTable(rows, colWidths=col_widths)
+                        table.setStyle(body_style)
+                    story.append(table)
                 
                 if len(data) > max_rows:
                     story.append(Spacer(1, 20))
@@ -118,6 +174,10 @@ class ExportService:
             
             # Build PDF
             doc.build(story)
+            tmp_path = filepath + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(buf.getvalue())
+            os.replace(tmp_path, filepath)
             
             # Create export record
             export_record = ExportService._create_export_record(
@@ -137,27 +197,39 @@ class ExportService:
         except Exception as e:
             return False, f"Error exporting to PDF: {str(e)}"
     
+    @staticmethod
+    def combine_search_results(search_results: Dict[str, Dict[str, pd.DataFrame]]) -> Optional[pd.DataFrame]:
+        """Flatten nested search results into one DataFrame
+
+        Callers exporting the same results more than once (CSV then PDF)
+        should combine once and pass the frame to export_search_results,
+        so the nested dict is traversed a single time.
+        """
+        # assign adds the provenance columns on a shallow copy and
+        # copy=False lets concat reuse those blocks, so no input frame
+        # is deep-copied just to tag it
+        frames = [
+            df.assign(data_source=data_source_name, table_name=table_name)
+            for data_source_name, tables in search_results.items()
+            for table_name, df in tables.items()
+            if not df.empty
+        ]
+        
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True, copy=False)
+    
     @staticmethod
     def export_search_results(search_results: Dict[str, Dict[str, pd.DataFrame]], 
-                             export_type: str, user_id: int, search_session_id: Optional[int] = None) -> tuple[bool, str]:
+                             export_type: str, user_id: int, search_session_id: Optional[int] = None,
+                             combined_df: Optional[pd.DataFrame] = None) -> tuple[bool, str]:
         """Export search results to file"""
         try:
-            # Combine all results into a single DataFrame
-            all_data = []
-            
-            for data_source_name, tables in search_results.items():
-                for table_name, df in tables.items():
-                    if not df.empty:
-                        # Add source information
-                        df_copy = df.copy()
-                        df_copy['data_source'] = data_source_name
-                        df_copy['table_name'] = table_name
-                        all_data.append(df_copy)
-            
-            if not all_data:
-                return False, "No data to export"
+            if combined_df is None:
+                combined_df = ExportService.combine_search_results(search_results)
             
-            combined_df = pd.concat(all_data, ignore_index=True)
+            if combined_df is None:
+                return False, "No data to export"
             
             # Generate filename
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -165,9 +237,11 @@ class ExportService:
             title = f"Search Results - {timestamp}"
             
             if export_type.lower() == 'csv':
-                return ExportService.export_to_csv(combined_df, filename, user_id, search_session_id)
+                return ExportService.export_to_csv(combined_df, filename, user_id, search_session_id,
+                                                   _timestamp=timestamp)
             elif export_type.lower() == 'pdf':
-                return ExportService.export_to_pdf(combined_df, filename, title, user_id, search_session_id)
+                return ExportService.export_to_pdf(combined_df, filename, title, user_id, search_session_id,
+                                                   _timestamp=timestamp)
             else:
                 return False, f"Unsupported export type: {export_type}"
                 
@@ -184,20 +258,16 @@ class ExportService:
             if not records:
                 return False, "No provenance data to export"
             
-            # Flatten records for export
-            export_data = []
-            for record in records:
-                record_data = {
-                    'data_source': record['data_source'],
-                    'table_name': record['table'],
-                    'person_identifier': record['person_identifier']
-                }
-                # Add record fields
-                for key, value in record['record'].items():
-                    record_data[f"field_{key}"] = str(value) if pd.notna(value) else ''
-                export_data.append(record_data)
-            
-            df = pd.DataFrame(export_data)
+            # Flatten records for export: json_normalize expands the
+            # nested record dicts in one pass, then NaN fill and
+            # stringification run vectorized instead of per cell
+            df = pd.json_normalize(records, sep='_')
+            df = df.rename(columns={
+                col: f"field_{col[len('record_'):]}"
+                for col in df.columns if col.startswith('record_')
+            })
+            df = df.rename(columns={'table': 'table_name'})
+            df = df.fillna('').astype(str)
             
             # Generate filename
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -206,9 +276,9 @@ class ExportService:
             title = f"Person Provenance Report - {person_id}"
             
             if export_type.lower() == 'csv':
-                return ExportService.export_to_csv(df, filename, user_id)
+                return ExportService.export_to_csv(df, filename, user_id, _timestamp=timestamp)
             elif export_type.lower() == 'pdf':
-                return ExportService.export_to_pdf(df, filename, title, user_id)
+                return ExportService.export_to_pdf(df, filename, title, user_id, _timestamp=timestamp)
             else:
                 return False, f"Unsupported export type: {export_type}"
                 
@@ -216,34 +286,30 @@ class ExportService:
             return False, f"Error exporting provenance: {str(e)}"
     
     @staticmethod
-    def get_export_history(user_id: int, limit: int = 50) -> List[ExportRecord]:
-        """Get export history for user"""
-        db = next(get_db())
-        try:
+    def get_export_history(user_id: int, offset: int = 0, limit: int = 50) -> List[ExportRecord]:
+        """Get a page of export history for user, newest first"""
+        with SessionLocal() as db:
             return db.query(ExportRecord).filter(
                 ExportRecord.user_id == user_id
-            ).order_by(ExportRecord.created_at.desc()).limit(limit).all()
-        finally:
-            db.close()
+            ).order_by(ExportRecord.created_at.desc()).offset(offset).limit(limit).all()
     
     @staticmethod
     def _create_export_record(user_id: int, search_session_id: Optional[int], export_type: str, filepath: str, records_count: int) -> Optional[ExportRecord]:
         """Create export record in database"""
-        try:
-            db = next(get_db())
-            export_record = ExportRecord(
-                user_id=user_id,
-                search_session_id=search_session_id,
-                export_type=export_type,
-                file_path=filepath,
-                records_count=records_count,
-                created_at=datetime.utcnow()
-            )
-            db.add(export_record)
-            db.commit()
-            return export_record
-        except Exception as e:
-            print(f"Error creating export record: {e}")
-            return None
-        finally:
-            db.close()
+        with SessionLocal() as db:
+            try:
+                export_record = ExportRecord(
+                    user_id=user_id,
+                    search_session_id=search_session_id,
+                    export_type=export_type,
+                    file_path=filepath,
+                    records_count=records_count,
+                    created_at=datetime.utcnow()
+                )
+                db.add(export_record)
+                db.commit()
+                return export_record
+            except Exception:
+                logger.exception("Error creating export record")
+                db.rollback()
+                return None
@@ -1,64 +1,221 @@
+import atexit
 import json
+import logging
+import re
+import threading
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, List, Any, Optional
-from database.models import SearchSession
-from database.connection import get_db
+from database.models import SearchSession, search_session_ds, recent_search_sessions_stmt
+from database.connection import SessionLocal
 from data_connectors.factory import ConnectorFactory
-from services.data_source_service import DataSourceService
+from services import connector_pool
+from services.data_source_service import DataSourceService, parsed_config, catalog_generation
 from utils.audit import log_action
 from config import Config
 
+try:
+    import sqlglot
+    from sqlglot import expressions as sqlglot_exp
+except ImportError:
+    sqlglot = None
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=512)
+def _strip_sensitive_projection(query: str):
+    """Rewrite a SELECT to drop sensitive columns before execution
+
+    Keeps the wire and memory cost of sensitive columns out of the
+    result entirely instead of fetching and then discarding them.
+    Returns None when sqlglot is unavailable, the query cannot be
+    parsed, or nothing needs stripping; callers then rely on the
+    Python-side post-filter alone.
+    """
+    if sqlglot is None:
+        return None
+    from data_connectors._matchers import is_sensitive_column
+    try:
+        tree = sqlglot.parse_one(query)
+        select = tree if isinstance(tree, sqlglot_exp.Select) else None
+        if select is None:
+            return None
+        kept = [
+            projection for projection in select.expressions
+            if isinstance(projection, sqlglot_exp.Star)
+            or not is_sensitive_column(projection.alias_or_name)
+        ]
+        if not kept or len(kept) == len(select.expressions):
+            return None
+        select.set('expressions', kept)
+        return select.sql()
+    except Exception:
+        return None
+
+# Columns that can identify a person, matched once per table instead of
+# substring-scanning a list per column ('id' also covers user_id,
+# customer_id and the like)
+_PERSON_COL_RE = re.compile(r'name|first|last|full|person|user|customer|client|id')
+
+@lru_cache(maxsize=8)
+def _active_source_ids(generation: int) -> tuple:
+    """Active data-source ids, memoized per catalog generation"""
+    return tuple(ds.id for ds in DataSourceService.get_all_data_sources(limit=None))
+
+@lru_cache(maxsize=256)
+def _person_columns(columns: tuple) -> tuple:
+    """Person-identifier columns for a column tuple, classified once
+
+    Tables from the same source share their schema across searches, so
+    the regex scan runs once per distinct column set.
+    """
+    return tuple(col for col in columns if _PERSON_COL_RE.search(col.lower()))
+
+# Short-TTL cache of search payloads. UI reruns repeat identical
+# searches within seconds; serving those from memory skips the whole
+# connector fan-out. Keys include the catalog generation so any
+# data-source change invalidates implicitly.
+_SEARCH_CACHE_TTL = 30
+_SEARCH_CACHE_MAX = 1024
+_search_cache = {}
+_search_cache_lock = threading.RLock()
+
+def _search_cache_get(key):
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if time.monotonic() >= expires_at:
+            del _search_cache[key]
+            return None
+        return payload
+
+def _search_cache_put(key, payload):
+    with _search_cache_lock:
+        if len(_search_cache) >= _SEARCH_CACHE_MAX:
+            # Drop the oldest entry (insertion-ordered dict)
+            _search_cache.pop(next(iter(_search_cache)))
+        _search_cache[key] = (time.monotonic() + _SEARCH_CACHE_TTL, payload)
+
+# Shared pool for fanning a search out across data sources. Source
+# queries are I/O-bound (network, DB, file reads), so threads overlap
+# their latency; a module-level pool avoids per-search thread startup.
+_search_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='search')
+atexit.register(_search_pool.shutdown)
+
 class SearchService:
     """Service for handling searches across data sources"""
     
+    @staticmethod
+    def _search_one_source(source: Dict[str, Any], identifier: str):
+        """Search a single data source; returns (id, name, results, count) or None
+
+        Takes a plain dict snapshot, not an ORM object: all catalog and
+        JSON work happens before the parallel phase, so workers touch no
+        database state.
+        """
+        try:
+            with connector_pool.acquire(source['id'], source['config']) as connector:
+                results = connector.search_person_records(identifier, limit=Config.SEARCH_ROW_LIMIT)
+        except connector_pool.ConnectorUnavailable:
+            return None
+        
+        if not results:
+            return None
+        count = sum(len(table_results) for table_results in results.values())
+        return source['id'], source['name'], results, count
+    
     @staticmethod
     def global_search(identifier: str, user_id: int, data_sources: Optional[List[int]] = None) -> Dict[str, Any]:
         """Perform global search across all data sources"""
         try:
             # Get all active data sources
             if data_sources is None:
-                data_sources = [ds.id for ds in DataSourceService.get_all_data_sources()]
+                data_sources = list(_active_source_ids(catalog_generation()))
+            
+            if not data_sources:
+                # Nothing to query; skip the session row and audit noise
+                return {"results": {}, "total_records": 0,
+                        "data_sources_queried": [], "search_session_id": None}
+            
+            cache_key = (identifier.strip().lower(), tuple(sorted(data_sources)), catalog_generation())
+            cached = _search_cache_get(cache_key)
+            if cached is not None:
+                # Skip the fan-out but still record a session for THIS
+                # user: the cache is shared across users, so reusing the
+                # original caller's session id would hang exports and
+                # history off someone else's row
+                search_session = None
+                try:
+                    search_session = SearchService._create_search_session(
+                        user_id, identifier, cached["total_records"],
+                        cached["data_sources_queried"], cached["source_ids"]
+                    )
+                except Exception as e:
+                    logger.warning("Could not create search session: %s", e)
+                session_id = search_session.id if search_session else None
+                log_action(user_id, "global_search", {
+                    "identifier": identifier,
+                    "results_count": cached["total_records"],
+                    "data_sources_queried": cached["data_sources_queried"],
+                    "search_session_id": session_id,
+                    "cached": True
+                })
+                # Shallow-copy the containers; the frames themselves are
+                # treated as read-only by all callers
+                return {
+                    "results": {k: dict(v) for k, v in cached["results"].items()},
+                    "total_records": cached["total_records"],
+                    "data_sources_queried": cached["data_sources_queried"],
+                    "search_session_id": session_id
+                }
             
             all_results = {}
             total_records = 0
             data_sources_queried = []
+            data_source_ids_queried = []
+            
+            # Resolve every source against one catalog snapshot and
+            # parse each connection string once, up front; the parallel
+            # phase then works on plain dicts only
+            source_snapshots = [
+                {'id': ds.id, 'name': ds.name, 'config': parsed_config(ds.connection_string)}
+                for ds in DataSourceService.get_data_sources_by_ids(data_sources)
+            ]
             
-            for data_source_id in data_sources:
+            # Query every source concurrently: wall-clock cost becomes
+            # the slowest source instead of the sum of all of them
+            futures = {
+                _search_pool.submit(SearchService._search_one_source, source, identifier): source['id']
+                for source in source_snapshots
+            }
+            for future in as_completed(futures):
                 try:
-                    data_source = DataSourceService.get_data_source_by_id(data_source_id)
-                    if not data_source:
-                        continue
-                    
-                    # Create connector
-                    config = json.loads(data_source.connection_string)
-                    connector = ConnectorFactory.create_connector(config)
-                    
-                    if connector.connect():
-                        # Search for person records
-                        results = connector.search_person_records(identifier)
-                        connector.disconnect()
-                        
-                        if results:
-                            all_results[data_source.name] = results
-                            data_sources_queried.append(data_source.name)
-                            
-                            # Count total records
-                            for table_results in results.values():
-                                total_records += len(table_results)
-                
+                    hit = future.result()
                 except Exception as e:
-                    print(f"Error searching data source {data_source_id}: {e}")
+                    logger.error("Error searching data source %s: %s", futures[future], e)
                     continue
+                if hit is None:
+                    continue
+                ds_id, ds_name, results, count = hit
+                all_results[ds_name] = results
+                data_sources_queried.append(ds_name)
+                data_source_ids_queried.append(ds_id)
+                total_records += count
             
             # Create search session (don't fail if this doesn't work)
             search_session = None
             try:
                 search_session = SearchService._create_search_session(
-                    user_id, identifier, total_records, data_sources_queried
+                    user_id, identifier, total_records, data_sources_queried,
+                    data_source_ids_queried
                 )
             except Exception as e:
-                print(f"Warning: Could not create search session: {e}")
+                logger.warning("Could not create search session: %s", e)
             
             # Log search action
             try:
@@ -69,8 +226,16 @@ class SearchService:
                     "search_session_id": search_session.id if search_session else None
                 })
             except Exception as e:
-                print(f"Warning: Could not log search action: {e}")
+                logger.warning("Could not log search action: %s", e)
             
+            # Cache without the session id (it is per-user); keep the
+            # source ids so hits can record their own session links
+            _search_cache_put(cache_key, {
+                "results": all_results,
+                "total_records": total_records,
+                "data_sources_queried": data_sources_queried,
+                "source_ids": data_source_ids_queried
+            })
             return {
                 "results": all_results,
                 "total_records": total_records,
@@ -79,7 +244,7 @@ class SearchService:
             }
             
         except Exception as e:
-            print(f"Error in global search: {e}")
+            logger.exception("Error in global search")
             return {
                 "results": {},
                 "total_records": 0,
@@ -95,17 +260,13 @@ class SearchService:
             if not data_source:
                 return {"error": "Data source not found"}
             
-            # Create connector
-            config = json.loads(data_source.connection_string)
-            connector = ConnectorFactory.create_connector(config)
-            
-            if not connector.connect():
+            config = parsed_config(data_source.connection_string)
+            try:
+                with connector_pool.acquire(data_source_id, config) as connector:
+                    results = connector.search_person_records(identifier, limit=Config.SEARCH_ROW_LIMIT)
+            except connector_pool.ConnectorUnavailable:
                 return {"error": "Failed to connect to data source"}
             
-            # Search for person records
-            results = connector.search_person_records(identifier)
-            connector.disconnect()
-            
             total_records = sum(len(df) for df in results.values())
             
             # Log search action
@@ -123,7 +284,7 @@ class SearchService:
             }
             
         except Exception as e:
-            print(f"Error searching data source: {e}")
+            logger.exception("Error searching data source")
             return {"error": str(e)}
     
     @staticmethod
@@ -134,20 +295,18 @@ class SearchService:
             if not data_source:
                 return {"error": "Data source not found"}
             
-            # Create connector
-            config = json.loads(data_source.connection_string)
-            connector = ConnectorFactory.create_connector(config)
-            
-            if not connector.connect():
+            config = parsed_config(data_source.connection_string)
+            # Drop sensitive projections in SQL where possible; the
+            # Python-side filter below stays as the safety net
+            rewritten = _strip_sensitive_projection(query)
+            try:
+                with connector_pool.acquire(data_source_id, config) as connector:
+                    results = connector.execute_query(rewritten or query)
+                    # Filter sensitive fields
+                    results = connector.filter_sensitive_fields(results, "custom_query")
+            except connector_pool.ConnectorUnavailable:
                 return {"error": "Failed to connect to data source"}
             
-            # Execute query
-            results = connector.execute_query(query)
-            connector.disconnect()
-            
-            # Filter sensitive fields
-            results = connector.filter_sensitive_fields(results, "custom_query")
-            
             # Log query execution
             log_action(user_id, "custom_query", {
                 "data_source_id": data_source_id,
@@ -163,42 +322,47 @@ class SearchService:
             }
             
         except Exception as e:
-            print(f"Error executing custom query: {e}")
+            logger.exception("Error executing custom query")
             return {"error": str(e)}
     
     @staticmethod
     def get_search_history(user_id: int, limit: int = 50) -> List[SearchSession]:
         """Get search history for user"""
-        db = next(get_db())
-        try:
-            return db.query(SearchSession).filter(
-                SearchSession.user_id == user_id
-            ).order_by(SearchSession.created_at.desc()).limit(limit).all()
-        finally:
-            db.close()
+        with SessionLocal() as db:
+            return db.scalars(
+                recent_search_sessions_stmt(), {'uid': user_id, 'lim': limit}
+            ).all()
     
     @staticmethod
-    def _create_search_session(user_id: int, query: str, results_count: int, data_sources_queried: List[str]) -> Optional[SearchSession]:
+    def _create_search_session(user_id: int, query: str, results_count: int, data_sources_queried: List[str], data_source_ids: Optional[List[int]] = None) -> Optional[SearchSession]:
         """Create search session record"""
-        try:
-            db = next(get_db())
-            search_session = SearchSession(
-                user_id=user_id,
-                search_query=query,
-                results_count=results_count,
-                data_sources_queried=data_sources_queried,
-                created_at=datetime.utcnow()
-            )
-            db.add(search_session)
-            db.commit()
-            db.refresh(search_session)  # Refresh to get the ID
-            return search_session
-        except Exception as e:
-            print(f"Error creating search session: {e}")
-            db.rollback()
-            return None
-        finally:
-            db.close()
+        with SessionLocal() as db:
+            try:
+                search_session = SearchSession(
+                    user_id=user_id,
+                    search_query=query,
+                    results_count=results_count,
+                    data_sources_queried=data_sources_queried,
+                    created_at=datetime.utcnow()
+                )
+                db.add(search_session)
+                # flush populates the PK from RETURNING/last_insert_rowid
+                # during the INSERT itself; refresh would cost a SELECT
+                db.flush()
+
+                # Normalized link rows so per-source aggregations are a plain
+                # GROUP BY instead of a JSON array expansion
+                if data_source_ids:
+                    db.execute(search_session_ds.insert(), [
+                        {"session_id": search_session.id, "data_source_id": ds_id}
+                        for ds_id in data_source_ids
+                    ])
+                db.commit()
+                return search_session
+            except Exception as e:
+                logger.exception("Error creating search session")
+                db.rollback()
+                return None
     
     @staticmethod
     def group_results_by_person(search_results: Dict[str, Dict[str, pd.DataFrame]]) -> Dict[str, List[Dict[str, Any]]]:
@@ -210,37 +374,67 @@ class SearchService:
                 if df.empty:
                     continue
                 
-                # Find person identifier columns
-                person_columns = []
-                for col in df.columns:
-                    col_lower = col.lower()
-                    if any(identifier in col_lower for identifier in ['name', 'first', 'last', 'full', 'person', 'user', 'customer', 'client', 'id', 'customerid', 'customer_id', 'userid', 'user_id']):
-                        person_columns.append(col)
+                person_columns = list(_person_columns(tuple(df.columns)))
+                if not person_columns:
+                    continue
+                
+                # First non-empty identifier per row, computed
+                # column-wise (bfill) instead of per-row iterrows
+                keys = df[person_columns].astype("string")
+                keys = keys.where(keys.notna() & (keys.apply(lambda c: c.str.strip()) != ''))
+                key_series = keys.bfill(axis=1).iloc[:, 0].str.strip().str.lower()
                 
-                if person_columns:
-                    # Group by person identifier
-                    for _, row in df.iterrows():
-                        person_key = None
-                        
-                        # Try to create a person key from identifier columns
-                        for col in person_columns:
-                            if pd.notna(row[col]) and str(row[col]).strip():
-                                person_key = str(row[col]).strip().lower()
-                                break
-                        
-                        if person_key:
-                            if person_key not in person_groups:
-                                person_groups[person_key] = []
-                            
-                            person_groups[person_key].append({
-                                "data_source": data_source_name,
-                                "table": table_name,
-                                "record": row.to_dict(),
-                                "person_identifier": person_key
-                            })
+                # Mask first so rows without a key never become dicts
+                keyed = key_series.notna()
+                records = df.loc[keyed].to_dict(orient='records')
+                for person_key, record in zip(key_series[keyed], records):
+                    person_groups.setdefault(person_key, []).append({
+                        "data_source": data_source_name,
+                        "table": table_name,
+                        "record": record,
+                        "person_identifier": person_key
+                    })
         
         return person_groups
     
+    @staticmethod
+    def group_results_as_frame(search_results: Dict[str, Dict[str, pd.DataFrame]]) -> pd.DataFrame:
+        """Group search results by person into one long-format DataFrame
+
+        Vectorized alternative to group_results_by_person: each result
+        table is processed whole (first non-null person column per row,
+        via bfill across the person columns) instead of per-row dict
+        building, and the output is a single frame with person_id,
+        data_source and table columns ready for groupby('person_id').
+        """
+        frames = []
+        
+        for data_source_name, tables in search_results.items():
+            for table_name, df in tables.items():
+                if df.empty:
+                    continue
+                
+                person_columns = list(_person_columns(tuple(df.columns)))
+                if not person_columns:
+                    continue
+                
+                # First non-empty identifier per row, computed column-wise
+                keys = df[person_columns].astype("string")
+                keys = keys.where(keys.notna() & (keys.apply(lambda c: c.str.strip()) != ''))
+                person_id = keys.bfill(axis=1).iloc[:, 0].str.strip().str.lower()
+                
+                part = df[person_id.notna()].copy()
+                if part.empty:
+                    continue
+                part.insert(0, 'table', table_name)
+                part.insert(0, 'data_source', data_source_name)
+                part.insert(0, 'person_id', person_id[person_id.notna()])
+                frames.append(part)
+        
+        if not frames:
+            return pd.DataFrame(columns=['person_id', 'data_source', 'table'])
+        return pd.concat(frames, ignore_index=True)
+    
     @staticmethod
     def get_person_provenance(person_identifier: str, user_id: int) -> Dict[str, Any]:
         """Get provenance information for a person across all data sources"""
@@ -77,9 +77,20 @@ def test_project_structure():
         "pages/dashboard.py"
     ]
     
+    # One scandir per directory instead of a stat syscall per file
+    present = set()
+    for directory in {os.path.dirname(p) or '.' for p in required_files}:
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        present.add(os.path.relpath(os.path.join(directory, entry.name)).replace(os.sep, '/'))
+        except FileNotFoundError:
+            continue
+    
     missing_files = []
     for file_path in required_files:
-        if not os.path.exists(file_path):
+        if file_path not in present:
             missing_files.append(file_path)
         else:
             print(f"✅ {file_path}")
@@ -1,57 +1,178 @@
+import atexit
+import logging
 import os
 import json
+import queue
+import threading
+import time
 from datetime import datetime
+from sqlalchemy import insert, select
 from database.models import AuditLog
-from database.connection import get_db
+from database.connection import SessionLocal, AuditSession
 from config import Config
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def _dumps(obj) -> str:
+    """Serialize with orjson's C encoder when available"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+# Audit rows are queued and flushed by a background thread so the
+# request path does not pay a second commit per action. Durability of
+# the last second of database entries is traded away (the file log is
+# still written inline); a full queue falls back to a synchronous
+# insert rather than dropping the row.
+_FLUSH_BATCH = 100
+_FLUSH_INTERVAL = 1.0
+
+_audit_queue = queue.Queue(maxsize=10000)
+_drain_started = threading.Lock()
+_drain_thread = None
+
+def _collect_batch():
+    """Block for one row, then gather more until the batch or interval fills"""
+    rows = [_audit_queue.get()]
+    deadline = time.monotonic() + _FLUSH_INTERVAL
+    while len(rows) < _FLUSH_BATCH:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            rows.append(_audit_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return rows
+
+def _drain():
+    while True:
+        rows = _collect_batch()
+        bulk_insert_audit(rows)
+        _write_file_batch(rows)
+
+def _flush_pending():
+    """Drain whatever is still queued at interpreter shutdown"""
+    rows = []
+    while True:
+        try:
+            rows.append(_audit_queue.get_nowait())
+        except queue.Empty:
+            break
+    if rows:
+        bulk_insert_audit(rows)
+        _write_file_batch(rows)
+
+atexit.register(_flush_pending)
+
+def _ensure_drain_thread():
+    global _drain_thread
+    if _drain_thread is None or not _drain_thread.is_alive():
+        with _drain_started:
+            if _drain_thread is None or not _drain_thread.is_alive():
+                _drain_thread = threading.Thread(target=_drain, daemon=True)
+                _drain_thread.start()
+
 def log_action(user_id, action, details=None, ip_address=None):
     """Log user action to database and file"""
     try:
-        # Log to database
-        db = next(get_db())
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            details=details or {},
-            ip_address=ip_address,
-            timestamp=datetime.utcnow()
-        )
-        db.add(audit_log)
-        db.commit()
-        db.close()
-        
-        # Log to file (immutable local storage)
-        log_to_file(user_id, action, details, ip_address)
-        
-    except Exception as e:
-        print(f"Error logging action: {e}")
-
-def log_to_file(user_id, action, details, ip_address):
-    """Log action to local file for immutable storage"""
-    try:
-        # Create logs directory if it doesn't exist
-        os.makedirs(Config.LOGS_DIR, exist_ok=True)
-        
-        log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+        row = {
             "user_id": user_id,
             "action": action,
             "details": details or {},
-            "ip_address": ip_address
+            "ip_address": ip_address,
+            "timestamp": datetime.utcnow()
         }
+        _ensure_drain_thread()
+        try:
+            _audit_queue.put_nowait(row)
+        except queue.Full:
+            bulk_insert_audit([row])
+            _write_file_batch([row])
         
-        # Append to audit log file
-        with open(Config.AUDIT_LOG_FILE, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(log_entry) + '\n')
-            
     except Exception as e:
-        print(f"Error writing to audit log file: {e}")
+        logger.error("Error logging action: %s", e)
+
+def bulk_insert_audit(rows):
+    """Insert audit rows with a single Core executemany
+
+    Skips ORM instrumentation (identity map, attribute history, per-row
+    flush) and lets the driver batch all rows into one multi-values
+    INSERT, so callers with many entries pay one round-trip.
+    """
+    if not rows:
+        return
+    # Dedicated engine: committing from the drain thread must not touch
+    # the connection UI sessions share
+    with AuditSession() as db:
+        try:
+            db.execute(insert(AuditLog), rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception("Error inserting audit rows")
+
+# The file log shares the batch path: one fd stays open between flushes
+# and each flush is a single multi-line write instead of an
+# open/write/close cycle per action.
+_audit_file = None
+_audit_file_lock = threading.Lock()
+
+def _audit_fd():
+    global _audit_file
+    if _audit_file is None or _audit_file.closed:
+        os.makedirs(Config.LOGS_DIR, exist_ok=True)
+        _audit_file = open(Config.AUDIT_LOG_FILE, 'a', encoding='utf-8')
+    return _audit_file
+
+def _close_audit_fd():
+    global _audit_file
+    with _audit_file_lock:
+        if _audit_file is not None and not _audit_file.closed:
+            _audit_file.close()
+
+atexit.register(_close_audit_fd)
+
+def _write_file_batch(rows):
+    """Append a batch of entries to the immutable file log in one write"""
+    if not rows:
+        return
+    try:
+        lines = ''.join(
+            _dumps({
+                "timestamp": row["timestamp"].isoformat(),
+                "user_id": row["user_id"],
+                "action": row["action"],
+                "details": row["details"],
+                "ip_address": row["ip_address"]
+            }) + '\n'
+            for row in rows
+        )
+        with _audit_file_lock:
+            f = _audit_fd()
+            f.write(lines)
+            f.flush()
+    except Exception as e:
+        logger.error("Error writing to audit log file: %s", e)
+
+def log_to_file(user_id, action, details, ip_address):
+    """Log a single action to the local file (kept for direct callers)"""
+    _write_file_batch([{
+        "timestamp": datetime.utcnow(),
+        "user_id": user_id,
+        "action": action,
+        "details": details or {},
+        "ip_address": ip_address
+    }])
 
 def get_audit_logs(user_id=None, action=None, start_date=None, end_date=None, limit=100):
     """Retrieve audit logs with optional filters"""
-    db = next(get_db())
-    try:
+    with SessionLocal() as db:
         query = db.query(AuditLog)
         
         if user_id:
@@ -68,57 +189,77 @@ def get_audit_logs(user_id=None, action=None, start_date=None, end_date=None, li
         
         logs = query.order_by(AuditLog.timestamp.desc()).limit(limit).all()
         return logs
-        
-    finally:
-        db.close()
+
+def purge_audit_logs(before):
+    """Delete database audit entries older than a cutoff
+
+    Keeps the append-only audit_logs table bounded so its indexes stay
+    hot; the immutable file log is left untouched. Returns the number of
+    rows removed.
+    """
+    with SessionLocal() as db:
+        try:
+            deleted = db.query(AuditLog).filter(
+                AuditLog.timestamp < before
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception as e:
+            db.rollback()
+            logger.exception("Error purging audit logs")
+            return 0
+
+def _audit_export_stmt(start_date=None, end_date=None, limit=10000):
+    """Column-level SELECT for exports; no ORM hydration"""
+    stmt = select(
+        AuditLog.timestamp, AuditLog.user_id, AuditLog.action,
+        AuditLog.details, AuditLog.ip_address
+    )
+    if start_date:
+        stmt = stmt.where(AuditLog.timestamp >= start_date)
+    if end_date:
+        stmt = stmt.where(AuditLog.timestamp <= end_date)
+    return stmt.order_by(AuditLog.timestamp.desc()).limit(limit)
 
 def export_audit_logs(start_date=None, end_date=None, format='csv'):
     """Export audit logs to file"""
-    logs = get_audit_logs(start_date=start_date, end_date=end_date, limit=10000)
-    
     if format == 'csv':
-        return export_audit_logs_csv(logs)
+        return export_audit_logs_csv(start_date, end_date)
     elif format == 'json':
-        return export_audit_logs_json(logs)
+        return export_audit_logs_json(start_date, end_date)
     else:
         raise ValueError("Unsupported format")
 
-def export_audit_logs_csv(logs):
-    """Export audit logs to CSV format"""
+def export_audit_logs_csv(start_date=None, end_date=None):
+    """Export audit logs to CSV format
+
+    Streams the rows through read_sql_query in 5000-row chunks, so
+    memory stays bounded and no AuditLog objects are materialized.
+    """
     import pandas as pd
     
-    data = []
-    for log in logs:
-        data.append({
-            'timestamp': log.timestamp,
-            'user_id': log.user_id,
-            'action': log.action,
-            'details': json.dumps(log.details) if log.details else '',
-            'ip_address': log.ip_address
-        })
-    
-    df = pd.DataFrame(data)
-    
     # Create exports directory if it doesn't exist
     os.makedirs(Config.EXPORTS_DIR, exist_ok=True)
     
     filename = f"audit_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     filepath = os.path.join(Config.EXPORTS_DIR, filename)
     
-    df.to_csv(filepath, index=False)
+    stmt = _audit_export_stmt(start_date, end_date)
+    with SessionLocal() as db:
+        first = True
+        for chunk in pd.read_sql_query(stmt, db.connection(), chunksize=5000):
+            chunk['details'] = chunk['details'].map(lambda d: _dumps(d) if d else '')
+            chunk.to_csv(filepath, index=False, mode='w' if first else 'a', header=first)
+            first = False
+        if first:
+            pd.DataFrame(columns=['timestamp', 'user_id', 'action', 'details', 'ip_address']).to_csv(
+                filepath, index=False
+            )
     return filepath
 
-def export_audit_logs_json(logs):
-    """Export audit logs to JSON format"""
-    data = []
-    for log in logs:
-        data.append({
-            'timestamp': log.timestamp.isoformat(),
-            'user_id': log.user_id,
-            'action': log.action,
-            'details': log.details,
-            'ip_address': log.ip_address
-        })
+def export_audit_logs_json(start_date=None, end_date=None):
+    """Export audit logs to JSON Lines format, streamed in chunks"""
+    import pandas as pd
     
     # Create exports directory if it doesn't exist
     os.makedirs(Config.EXPORTS_DIR, exist_ok=True)
@@ -126,7 +267,8 @@ def export_audit_logs_json(logs):
     filename = f"audit_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
     filepath = os.path.join(Config.EXPORTS_DIR, filename)
     
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, default=str)
-    
+    stmt = _audit_export_stmt(start_date, end_date)
+    with SessionLocal() as db, open(filepath, 'w', encoding='utf-8') as f:
+        for chunk in pd.read_sql_query(stmt, db.connection(), chunksize=5000):
+            chunk.to_json(f, orient='records', lines=True, date_format='iso')
     return filepath
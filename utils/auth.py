@@ -1,24 +1,75 @@
 import bcrypt
+import hashlib
+import hmac
+import time
 import streamlit as st
 from datetime import datetime
-from database.models import User
-from database.connection import get_db
+from database.models import User, active_user_by_username_stmt, user_by_username_stmt, user_by_email_stmt
+from database.connection import SessionLocal
 from utils.audit import log_action
+from config import Config
+
+try:
+    from streamlit_cookies_manager import EncryptedCookieManager
+except ImportError:
+    EncryptedCookieManager = None
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerifyMismatchError, InvalidHashError
+    _argon2_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2)
+except ImportError:
+    _argon2_hasher = None
+
+# How long a session-restore token stays valid (seconds)
+AUTH_TOKEN_TTL = 8 * 3600
+
+# Verified against on unknown-username logins so "no such user" takes
+# as long as "wrong password"; hashed once at import, not per attempt
+_DUMMY_HASH = None
+
+def _dummy_hash():
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None:
+        _DUMMY_HASH = hash_password("invalid")
+    return _DUMMY_HASH
 
 def hash_password(password):
-    """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Hash password with the configured algorithm
+
+    argon2 (when installed and selected) spreads the work across cores;
+    the bcrypt cost is tunable via Config.BCRYPT_ROUNDS, where each
+    step halves or doubles the per-login CPU cost.
+    """
+    if Config.PASSWORD_ALGO == 'argon2' and _argon2_hasher is not None:
+        return _argon2_hasher.hash(password).encode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'),
+                         bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS))
 
 def verify_password(password, hashed_password):
-    """Verify password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    """Verify password against hash, dispatching on the hash prefix"""
+    if isinstance(hashed_password, str):
+        # Hashes written before the column became binary
+        hashed_password = hashed_password.encode('utf-8')
+    if hashed_password.startswith(b'$argon2'):
+        if _argon2_hasher is None:
+            return False
+        try:
+            return _argon2_hasher.verify(hashed_password.decode('utf-8'), password)
+        except (VerifyMismatchError, InvalidHashError):
+            return False
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
 
 def authenticate_user(username, password):
     """Authenticate user login"""
-    db = next(get_db())
-    try:
-        user = db.query(User).filter(User.username == username, User.is_active == True).first()
-        if user and verify_password(password, user.password_hash):
+    with SessionLocal() as db:
+        user = db.scalars(active_user_by_username_stmt(), {'u': username}).first()
+        if user is None:
+            # Burn the same hash cost as a wrong password so response
+            # time does not reveal whether the username exists
+            verify_password(password, _dummy_hash())
+            return None
+        if verify_password(password, user.password_hash):
             # Update last login
             user.last_login = datetime.utcnow()
             db.commit()
@@ -28,49 +79,89 @@ def authenticate_user(username, password):
             
             return user
         return None
-    finally:
-        db.close()
 
 def create_user(username, password, full_name, email, role, created_by=None):
     """Create new user"""
-    db = next(get_db())
+    with SessionLocal() as db:
+        try:
+            # Check if user already exists
+            existing_user = db.scalars(user_by_username_stmt(), {'u': username}).first()
+            if existing_user:
+                return False, "Username already exists"
+            
+            existing_email = db.scalars(user_by_email_stmt(), {'e': email}).first()
+            if existing_email:
+                return False, "Email already exists"
+            
+            # Create new user
+            hashed_password = hash_password(password)
+            new_user = User(
+                username=username,
+                password_hash=hashed_password,
+                full_name=full_name,
+                email=email,
+                role=role,
+                created_at=datetime.utcnow()
+            )
+            
+            db.add(new_user)
+            db.commit()
+            
+            # Log user creation
+            if created_by:
+                log_action(created_by, "create_user", {
+                    "new_username": username,
+                    "new_role": role
+                })
+            
+            return True, "User created successfully"
+        except Exception as e:
+            db.rollback()
+            return False, f"Error creating user: {str(e)}"
+
+def get_user_by_id(user_id):
+    """Fetch an active user by primary key"""
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        if user and user.is_active:
+            return user
+        return None
+
+def _token_signature(payload):
+    return hmac.new(Config.COOKIE_SECRET.encode('utf-8'),
+                    payload.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def make_auth_token(user_id):
+    """Build a signed token for cookie-based session restore
+
+    Restoring from the cookie is a single primary-key lookup instead of
+    re-running the bcrypt verify (deliberately ~100ms) on every browser
+    refresh.
+    """
+    if not Config.COOKIE_SECRET:
+        return None
+    payload = f"{user_id}:{int(time.time()) + AUTH_TOKEN_TTL}"
+    return f"{payload}:{_token_signature(payload)}"
+
+def cookie_manager():
+    """Cookie manager for session restore, or None when unavailable"""
+    if EncryptedCookieManager is None or not Config.COOKIE_SECRET:
+        return None
+    return EncryptedCookieManager(prefix='datadock', password=Config.COOKIE_SECRET)
+
+def verify_auth_token(token):
+    """Return the user for a valid, unexpired restore token, else None"""
+    if not token or not Config.COOKIE_SECRET:
+        return None
     try:
-        # Check if user already exists
-        existing_user = db.query(User).filter(User.username == username).first()
-        if existing_user:
-            return False, "Username already exists"
-        
-        existing_email = db.query(User).filter(User.email == email).first()
-        if existing_email:
-            return False, "Email already exists"
-        
-        # Create new user
-        hashed_password = hash_password(password)
-        new_user = User(
-            username=username,
-            password_hash=hashed_password,
-            full_name=full_name,
-            email=email,
-            role=role,
-            created_at=datetime.utcnow()
-        )
-        
-        db.add(new_user)
-        db.commit()
-        
-        # Log user creation
-        if created_by:
-            log_action(created_by, "create_user", {
-                "new_username": username,
-                "new_role": role
-            })
-        
-        return True, "User created successfully"
-    except Exception as e:
-        db.rollback()
-        return False, f"Error creating user: {str(e)}"
-    finally:
-        db.close()
+        uid, exp, sig = token.split(':')
+        if not hmac.compare_digest(sig, _token_signature(f"{uid}:{exp}")):
+            return None
+        if int(exp) < time.time():
+            return None
+        return get_user_by_id(int(uid))
+    except (ValueError, TypeError):
+        return None
 
 def get_current_user():
     """Get current user from session state"""
@@ -100,5 +191,13 @@ def logout():
         user = st.session_state['user']
         log_action(user.id, "logout", {"username": user.username})
         del st.session_state['user']
+    # Expire the restore cookie, and flag the session so the login page
+    # does not restore from a stale token if the cookie component is
+    # not ready on this run
+    st.session_state['logged_out'] = True
+    cookies = cookie_manager()
+    if cookies is not None and cookies.ready() and cookies.get('auth_token'):
+        cookies['auth_token'] = ''
+        cookies.save()
     st.success("Logged out successfully")
     st.rerun()
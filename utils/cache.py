@@ -0,0 +1,20 @@
+import json
+import streamlit as st
+from data_connectors.factory import ConnectorFactory
+
+@st.cache_resource(show_spinner=False)
+def get_connector(config_json: str):
+    """Get a shared, connected connector for a serialized data source config"""
+    connector = ConnectorFactory.create_connector(json.loads(config_json))
+    connector.connect()
+    return connector
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_query(config_json: str, query: str, params=None):
+    """Execute a query through the shared connector, cached across reruns"""
+    return get_connector(config_json).execute_query(query, params)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_schema(config_json: str):
+    """Schema for a data source config, cached for five minutes"""
+    return get_connector(config_json).get_schema()